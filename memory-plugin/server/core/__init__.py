@@ -7,7 +7,15 @@ from .estimator import TokenEstimator
 from .scorer import NodeScorer
 from .compactor import Compactor
 from .persistence import GraphPersistence
-from .utils import is_archived, version_key_node, version_key_edge, edge_storage_key, validate_level
+from .utils import (
+    is_archived,
+    version_key_node,
+    version_key_edge,
+    version_key_to_str,
+    version_key_from_str,
+    edge_storage_key,
+    validate_level,
+)
 
 __all__ = [
     # Types
@@ -21,12 +29,16 @@ __all__ = [
     "COMPACTION_TARGET_RATIO",
     "SESSION_ID_LENGTH",
     "SESSION_TTL_SECONDS",
+    "SAVE_COALESCE_SECONDS",
+    "JOURNAL_MAX_ENTRIES",
+    "GRAPH_SCHEMA_VERSION",
     "GRACE_PERIOD_DAYS",
     "ORPHAN_GRACE_DAYS",
     "MAX_RECENT_BACKUPS",
     "MAX_DAILY_BACKUPS",
     "MAX_WEEKLY_BACKUPS",
     "BACKUP_INTERVAL_SECONDS",
+    "MAX_PATH_HOPS",
     "LEVELS",
     # Exceptions
     "KGError",
@@ -42,6 +54,8 @@ __all__ = [
     "is_archived",
     "version_key_node",
     "version_key_edge",
+    "version_key_to_str",
+    "version_key_from_str",
     "edge_storage_key",
     "validate_level",
 ]
@@ -1,6 +1,8 @@
 """Graph compaction (archiving low-value nodes)."""
 
+import heapq
 import logging
+from operator import itemgetter
 from .constants import COMPACTION_TARGET_RATIO
 from .estimator import TokenEstimator
 from .scorer import NodeScorer
@@ -16,18 +18,18 @@ class Compactor:
         self.estimator = estimator
         self.max_tokens = max_tokens
 
-    def compact_if_needed(self, nodes: dict, edges: dict, versions: dict) -> list[str]:
+    def compact_if_needed(
+        self, nodes: dict, edges: dict, versions: dict, tokens: dict | None = None
+    ) -> list[str]:
         """
         Archive nodes if graph exceeds token limit.
+        tokens: optional per-node token estimate cache for this graph.
         Returns list of archived node IDs.
         """
-        estimated_tokens = self.estimator.estimate_graph(nodes, edges, include_archived=False)
-
-        if estimated_tokens <= self.max_tokens:
+        # Stops summing as soon as the limit is crossed
+        if not self.estimator.exceeds(nodes, edges, self.max_tokens, tokens):
             return []
 
-        logger.info(f"Compacting graph: {estimated_tokens} tokens > {self.max_tokens} limit")
-
         # Score eligible nodes
         scores = self.scorer.score_all(nodes, edges, versions)
 
@@ -35,21 +37,31 @@ class Compactor:
             logger.debug("No nodes eligible for archiving (all within grace period)")
             return []
 
-        # Sort by score (ascending - lowest scores archived first)
-        sorted_nodes = sorted(scores.items(), key=lambda x: x[1])
+        # Full total only once there is something to archive
+        estimated_tokens = self.estimator.estimate_graph(
+            nodes, edges, include_archived=False, tokens=tokens
+        )
+
+        logger.info(f"Compacting graph: {estimated_tokens} tokens > {self.max_tokens} limit")
 
         # Archive until we're under target
         target = int(self.max_tokens * COMPACTION_TARGET_RATIO)
         archived = []
 
+        # Lowest scores archived first. Expect to need about overshoot / average
+        # node cost of them, so select those rather than sorting every score
+        avg_tokens = estimated_tokens / len(nodes)
+        k = max(8, int((estimated_tokens - target) / avg_tokens))
+        sorted_nodes = self._lowest_first(scores, k)
+
         for node_id, score in sorted_nodes:
             if estimated_tokens <= target:
                 break
 
             node = nodes.get(node_id)
-            if node and not node.get("_archived"):
+            if node and "_archived" not in node:
                 # Calculate token cost
-                token_cost = self.estimator.estimate_node(node)
+                token_cost = self.estimator.cached_node(node_id, node, tokens)
 
                 # Archive the node
                 node["_archived"] = True
@@ -62,3 +74,23 @@ class Compactor:
 
         logger.info(f"Compaction complete: archived {len(archived)} nodes, now ~{estimated_tokens} tokens")
         return archived
+
+    @staticmethod
+    def _lowest_first(scores: dict[str, float], k: int):
+        """
+        Yield (node_id, score) pairs in ascending score order, same as a full sort.
+        Only the k lowest are picked up front; the rest are sorted if still needed.
+        """
+        by_score = itemgetter(1)
+        if k >= len(scores):
+            yield from sorted(scores.items(), key=by_score)
+            return
+
+        lowest = heapq.nsmallest(k, scores.items(), key=by_score)
+        yield from lowest
+
+        taken = {node_id for node_id, _ in lowest}
+        yield from sorted(
+            ((node_id, score) for node_id, score in scores.items() if node_id not in taken),
+            key=by_score,
+        )
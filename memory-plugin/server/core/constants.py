@@ -12,6 +12,11 @@ COMPACTION_TARGET_RATIO = 0.9
 SESSION_ID_LENGTH = 8
 SESSION_TTL_SECONDS = 24 * 60 * 60  # 24 hours
 
+# Persistence
+SAVE_COALESCE_SECONDS = 0.5  # Window to batch a burst of writes into one save
+JOURNAL_MAX_ENTRIES = 1000   # Journal records before folding into a full snapshot
+GRAPH_SCHEMA_VERSION = 2     # On-disk format; 2 stores edges as a list
+
 # Grace periods
 GRACE_PERIOD_DAYS = 7
 ORPHAN_GRACE_DAYS = 7
@@ -22,6 +27,9 @@ MAX_DAILY_BACKUPS = 7     # Keep 7 daily backups (one per day)
 MAX_WEEKLY_BACKUPS = 4    # Keep 4 weekly backups (one per week)
 BACKUP_INTERVAL_SECONDS = 3600  # Minimum 1 hour between backups
 
+# Traversal
+MAX_PATH_HOPS = 6  # Longest node chain a path search will look for
+
 # Graph levels
 LEVELS = ("user", "project")
 
@@ -14,15 +14,58 @@ class TokenEstimator:
         return BASE_NODE_TOKENS + gist_tokens + notes_tokens
 
     @staticmethod
-    def estimate_graph(nodes: dict, edges: dict, include_archived: bool = False) -> int:
+    def cached_node(node_id: str, node: dict, tokens: dict | None) -> int:
+        """
+        Estimate token cost for a node, using and filling a per-graph cache.
+        tokens: node_id -> estimate; the owner drops an entry when the node changes.
+        """
+        if tokens is None:
+            return TokenEstimator.estimate_node(node)
+        cost = tokens.get(node_id)
+        if cost is None:
+            cost = tokens[node_id] = TokenEstimator.estimate_node(node)
+        return cost
+
+    @staticmethod
+    def invalidate(tokens: dict | None, node_id: str):
+        """Drop a node's cached estimate after its content changed or it was removed."""
+        if tokens is not None:
+            tokens.pop(node_id, None)
+
+    @staticmethod
+    def exceeds(nodes: dict, edges: dict, limit: int, tokens: dict | None = None) -> bool:
+        """
+        Check whether the active graph estimate is over limit.
+        Stops summing as soon as the limit is crossed.
+        """
+        total = len(edges) * TOKENS_PER_EDGE
+        if total > limit:
+            return True
+
+        cached_node = TokenEstimator.cached_node
+        for node_id, n in nodes.items():
+            if "_archived" in n:
+                continue
+            total += cached_node(node_id, n, tokens)
+            if total > limit:
+                return True
+        return False
+
+    @staticmethod
+    def estimate_graph(
+        nodes: dict, edges: dict, include_archived: bool = False, tokens: dict | None = None
+    ) -> int:
         """Estimate total token cost for a graph level."""
+        cached_node = TokenEstimator.cached_node
         if include_archived:
-            node_tokens = sum(TokenEstimator.estimate_node(n) for n in nodes.values())
+            node_tokens = sum(
+                cached_node(node_id, n, tokens) for node_id, n in nodes.items()
+            )
         else:
             node_tokens = sum(
-                TokenEstimator.estimate_node(n)
-                for n in nodes.values()
-                if not n.get("_archived")
+                cached_node(node_id, n, tokens)
+                for node_id, n in nodes.items()
+                if "_archived" not in n
             )
 
         edge_tokens = len(edges) * TOKENS_PER_EDGE
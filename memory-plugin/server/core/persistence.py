@@ -1,9 +1,12 @@
-"""Graph persistence with atomic writes and tiered backup strategy."""
+"""Graph persistence with atomic writes, an append-only journal and tiered backup strategy."""
 
+import hashlib
+import io
 import json
 import logging
 import os
 import shutil
+import sys
 import time
 from pathlib import Path
 from .constants import (
@@ -11,43 +14,130 @@ from .constants import (
     MAX_DAILY_BACKUPS,
     MAX_WEEKLY_BACKUPS,
     BACKUP_INTERVAL_SECONDS,
+    JOURNAL_MAX_ENTRIES,
+    GRAPH_SCHEMA_VERSION,
 )
-from .utils import edge_storage_key
+from .utils import edge_storage_key, version_key_to_str, version_key_from_str
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Flush file data without the extra metadata write fsync does (mtime etc.);
+# os.fdatasync isn't available on macOS
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _dumps(obj) -> bytes:
+    """Encode obj as compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(data: bytes):
+    """Decode JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _digest(data: bytes) -> bytes:
+    """Fingerprint encoded snapshot bytes, to spot a save that would rewrite the same file."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _dumps_pretty(obj) -> bytes:
+    """Encode obj as JSON bytes indented by two spaces, for hand inspection."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode()
+
 
 class GraphPersistence:
-    """Handles graph persistence with atomic writes and tiered backup strategy."""
+    """
+    Handles graph persistence with atomic writes and tiered backup strategy.
+
+    Full snapshots are written to the graph file. Between snapshots, changed
+    items are appended to a journal next to it, which load() replays over the
+    snapshot. A snapshot truncates the journal.
 
-    def __init__(self, path: Path):
+    Snapshots carry a generation number that journal records are tagged
+    with. A snapshot replacing a journal gets the next generation, so if the
+    journal outlives it (a crash between the rename and the unlink), replay
+    skips records the snapshot already covers.
+    """
+
+    def __init__(self, path: Path, pretty: bool = False):
         self.path = path
+        # Compact by default; pretty indents each entry in full saves
+        self._dumps = _dumps_pretty if pretty else _dumps
         self.backup_marker = path.with_suffix(".last_backup")
+        self.journal_path = path.with_suffix(".journal")
+        # Appended rather than swapped in for the suffix, so it can't collide
+        # with another file derived from the same stem
+        self.temp_path = path.with_name(path.name + ".tmp")
+        self.journal_entries = 0
+        # Generation of the snapshot on disk, and of the one last encoded
+        self.generation = 0
+        self._encoded_generation = 0
+        # Set when a failed append may have left a partial record behind
+        self._journal_torn = False
+        # Digest of the snapshot file as last loaded or written
+        self._snapshot_digest: bytes | None = None
 
     def load(self) -> tuple[dict, dict]:
         """
-        Load graph and versions from disk.
+        Load graph and versions from disk, replaying any journaled changes.
         Returns (graph_data, versions_dict).
         """
+        graph, versions = self._load_snapshot()
+        self.journal_entries = self._replay_journal(graph, versions)
+        return graph, versions
+
+    def _load_snapshot(self) -> tuple[dict, dict]:
+        """Load the last full snapshot. Returns (graph_data, versions_dict)."""
         if not self.path.exists():
             return {"nodes": {}, "edges": {}}, {}
 
         try:
-            with open(self.path) as f:
-                data = json.load(f)
-
-            # Extract versions
-            versions = data.get("_meta", {}).get("versions", {})
-
-            # Load nodes
-            nodes = {k: v for k, v in data.get("nodes", {}).items() if k != "_meta"}
+            raw = self.path.read_bytes()
+            data = _loads(raw)
+            self._snapshot_digest = _digest(raw)
+
+            # Ids, refs and rels repeat across nodes, edges and versions;
+            # interning collapses each to one string, so lookups from
+            # another structure usually match by identity
+            intern = sys.intern
+
+            # Load nodes: node dicts are used as-is, only the keys are interned
+            nodes = {
+                intern(node_id): node
+                for node_id, node in data.get("nodes", {}).items()
+                if node_id != "_meta"
+            }
 
-            # Load edges (convert string keys to tuple keys internally)
-            edges_data = data.get("edges", {})
+            # Load edges (keyed by tuple internally). Schema 2 stores a list;
+            # older files keyed them by "from->to:rel", which is redundant
+            edges_data = data.get("edges", [])
+            if isinstance(edges_data, dict):
+                edges_data = edges_data.values()
             edges = {}
-            for key, edge in edges_data.items():
-                tuple_key = (edge["from"], edge["to"], edge["rel"])
-                edges[tuple_key] = edge
+            for e in edges_data:
+                e["from"], e["to"], e["rel"] = key = (intern(e["from"]), intern(e["to"]), intern(e["rel"]))
+                edges[key] = e
+
+            # Extract versions (convert string keys to tuple keys internally)
+            meta = data.get("_meta", {})
+            edge_keys = {edge_storage_key(*k): k for k in edges}
+            versions = {
+                version_key_from_str(key, edge_keys): ver
+                for key, ver in meta.get("versions", {}).items()
+            }
+            self.generation = meta.get("generation", 0)
 
             graph = {"nodes": nodes, "edges": edges}
 
@@ -58,36 +148,184 @@ class GraphPersistence:
             logger.error(f"Failed to load graph from {self.path}: {e}")
             return {"nodes": {}, "edges": {}}, {}
 
+    def _replay_journal(self, graph: dict, versions: dict) -> int:
+        """
+        Apply journaled changes on top of a loaded snapshot. Modifies in-place.
+        Returns number of records replayed.
+        """
+        if not self.journal_path.exists():
+            return 0
+
+        nodes = graph["nodes"]
+        edges = graph["edges"]
+        count = 0
+        stale = 0
+
+        try:
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = _loads(line)
+                    except ValueError:
+                        # Torn write from a crash: nothing after it was committed
+                        logger.warning(f"Ignoring incomplete journal record in {self.journal_path}")
+                        break
+
+                    # Journaled before the snapshot was written, so already in it
+                    if record.get("gen", 0) < self.generation:
+                        stale += 1
+                        continue
+
+                    key = tuple(map(sys.intern, record["key"]))
+                    target, item_key = (nodes, key[1]) if key[0] == "node" else (edges, key[1:])
+
+                    if record["data"] is None:
+                        target.pop(item_key, None)
+                    else:
+                        target[item_key] = record["data"]
+
+                    if record["ver"] is None:
+                        versions.pop(key, None)
+                    else:
+                        versions[key] = record["ver"]
+
+                    count += 1
+
+        except Exception as e:
+            logger.error(f"Failed to replay journal {self.journal_path}: {e}")
+
+        if stale:
+            logger.info(f"Skipped {stale} journal records older than {self.path}")
+        if count:
+            logger.info(f"Replayed {count} journal records from {self.journal_path}")
+        return count
+
+    def needs_snapshot(self, pending: int) -> bool:
+        """Check whether pending changes should go into a full save rather than the journal."""
+        return (
+            not self.path.exists()
+            or self._journal_torn
+            or self.journal_entries + pending > JOURNAL_MAX_ENTRIES
+            or self._backup_due()
+        )
+
+    def append_journal(self, graph: dict, versions: dict, keys) -> bool:
+        """
+        Append the current state of the given items to the journal.
+        keys are version keys; an item missing from the graph is journaled as deleted.
+        Returns True on success, False on failure.
+        """
+        keys = list(keys)
+        data = self.encode_journal(graph, versions, keys)
+        return data is not None and self.write_journal(data, len(keys))
+
+    def encode_journal(self, graph: dict, versions: dict, keys) -> bytes | None:
+        """
+        Encode journal records for the given items without touching disk.
+        Returns the bytes to append, or None on failure.
+        """
+        nodes = graph["nodes"]
+        edges = graph["edges"]
+        # Always compact, even with pretty set: one record per line
+        dumps = _dumps
+        generation = self.generation
+
+        try:
+            lines = []
+            for key in keys:
+                data = nodes.get(key[1]) if key[0] == "node" else edges.get(key[1:])
+                lines.append(dumps({"key": key, "data": data, "ver": versions.get(key), "gen": generation}))
+            lines.append(b"")
+            return b"\n".join(lines)
+
+        except Exception as e:
+            logger.error(f"Failed to encode journal records for {self.journal_path}: {e}")
+            return None
+
+    def write_journal(self, data: bytes, count: int) -> bool:
+        """
+        Append encoded journal records (count of them) and fsync.
+        Returns True on success, False on failure.
+        """
+        try:
+            with open(self.journal_path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                _datasync(f.fileno())  # Ensure written to disk
+
+            self.journal_entries += count
+            logger.debug(f"Journaled {count} changes to {self.journal_path}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to append journal {self.journal_path}: {e}")
+            # The journal may now end in a partial record; anything appended
+            # after it would be lost with it on replay, so the retry has to
+            # go into a snapshot
+            self._journal_torn = True
+            return False
+
     def save(self, graph: dict, versions: dict) -> bool:
         """
-        Save graph to disk with atomic write.
+        Save a full snapshot to disk with atomic write, then truncate the journal.
         Returns True on success, False on failure.
         """
+        data = self.encode_snapshot(graph, versions)
+        return data is not None and self.write_snapshot(data)
+
+    def encode_snapshot(self, graph: dict, versions: dict) -> bytes | None:
+        """
+        Encode a full snapshot in memory without touching disk, so the caller
+        can release its lock before the write. Returns None on failure.
+        """
+        # Only a snapshot superseding journal records needs a new generation;
+        # otherwise an unchanged graph still encodes to the bytes on disk
+        generation = self.generation
+        if self.journal_entries or self.journal_path.exists():
+            generation += 1
+
         try:
-            self.path.parent.mkdir(parents=True, exist_ok=True)
+            buf = io.BytesIO()
+            self._write_graph(buf, graph, versions, generation)
+            self._encoded_generation = generation
+            return buf.getvalue()
 
-            # Convert edges from tuple keys to string keys for JSON
-            edges_for_disk = {
-                edge_storage_key(e["from"], e["to"], e["rel"]): e
-                for e in graph["edges"].values()
-            }
+        except Exception as e:
+            logger.error(f"Failed to encode graph for {self.path}: {e}")
+            return None
 
-            data = {
-                "nodes": graph["nodes"],
-                "edges": edges_for_disk,
-                "_meta": {"versions": versions}
-            }
+    def write_snapshot(self, data: bytes) -> bool:
+        """
+        Write an encoded snapshot with atomic write, then truncate the journal.
+        The snapshot must cover every record journaled before it.
+        Returns True on success, False on failure.
+        """
+        # Same bytes as the file on disk and nothing journaled on top: the
+        # write, fsync and rename would change nothing
+        digest = _digest(data)
+        if digest == self._snapshot_digest and not self.journal_entries and self.path.exists():
+            logger.debug(f"Graph unchanged, skipped rewriting {self.path}")
+            return True
 
-            # Atomic write: write to temp file, then rename
-            temp_path = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(temp_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Atomic write: write to temp file, then rename
+            with open(self.temp_path, 'wb') as f:
+                f.write(data)
                 f.flush()
-                os.fsync(f.fileno())  # Ensure written to disk
+                _datasync(f.fileno())  # Ensure written to disk
 
             # Atomic rename (POSIX guarantees atomicity)
-            temp_path.replace(self.path)
+            os.replace(self.temp_path, self.path)
+            self._snapshot_digest = digest
+            self.generation = self._encoded_generation
+
+            # Snapshot now covers everything journaled so far
+            if self.journal_entries or self.journal_path.exists():
+                self.journal_path.unlink(missing_ok=True)
+                self.journal_entries = 0
+            self._journal_torn = False
 
             logger.debug(f"Saved graph to {self.path}")
             return True
@@ -95,11 +333,47 @@ class GraphPersistence:
         except Exception as e:
             logger.error(f"Failed to save graph to {self.path}: {e}")
             # Cleanup failed temp file
-            temp_path = self.path.with_suffix(".tmp")
-            if temp_path.exists():
-                temp_path.unlink()
+            self.temp_path.unlink(missing_ok=True)
             return False
 
+    def _write_graph(self, f, graph: dict, versions: dict, generation: int):
+        """
+        Write the graph to binary file f as a single JSON document.
+        Each node, edge and version is encoded separately, one per line.
+        """
+        f.write(b'{\n"nodes": {')
+        self._write_entries(f, graph["nodes"].items())
+
+        # Edges carry their own from/to/rel, so they are stored as a list
+        f.write(b'},\n"edges": [')
+        self._write_items(f, graph["edges"].values())
+
+        f.write(b'],\n"_meta": {"schema_version": %d, "generation": %d, "versions": {' % (GRAPH_SCHEMA_VERSION, generation))
+        self._write_entries(f, ((version_key_to_str(k), v) for k, v in versions.items()))
+        f.write(b'}}\n}\n')
+
+    def _write_entries(self, f, entries):
+        """Write (key, value) pairs as the members of a JSON object."""
+        dumps = self._dumps
+        separator = b"\n"
+        for key, value in entries:
+            f.write(separator)
+            f.write(_dumps(key))
+            f.write(b":")
+            f.write(dumps(value))
+            separator = b",\n"
+        f.write(b"\n")
+
+    def _write_items(self, f, items):
+        """Write values as the elements of a JSON array."""
+        dumps = self._dumps
+        separator = b"\n"
+        for item in items:
+            f.write(separator)
+            f.write(dumps(item))
+            separator = b",\n"
+        f.write(b"\n")
+
     def maybe_backup(self) -> bool:
         """
         Create tiered backups if enough time has passed.
@@ -109,10 +383,8 @@ class GraphPersistence:
             return False
 
         # Check if enough time has passed since last backup
-        if self.backup_marker.exists():
-            last_backup_time = self.backup_marker.stat().st_mtime
-            if time.time() - last_backup_time < BACKUP_INTERVAL_SECONDS:
-                return False
+        if not self._backup_due():
+            return False
 
         # Perform backup rotation
         self._rotate_backups()
@@ -121,6 +393,14 @@ class GraphPersistence:
         self.backup_marker.touch()
         return True
 
+    def _backup_due(self) -> bool:
+        """Check if enough time has passed since the last backup."""
+        if self.backup_marker.exists():
+            last_backup_time = self.backup_marker.stat().st_mtime
+            if time.time() - last_backup_time < BACKUP_INTERVAL_SECONDS:
+                return False
+        return True
+
     def _rotate_backups(self):
         """
         Rotate backups into three tiers:
@@ -143,9 +423,9 @@ class GraphPersistence:
             old_backup = self.path.with_suffix(f".json.bak.{i}")
             new_backup = self.path.with_suffix(f".json.bak.{i + 1}")
             if old_backup.exists():
-                shutil.copy2(old_backup, new_backup)
+                os.replace(old_backup, new_backup)
 
-        # Create new .bak.1
+        # Create new .bak.1 as a real copy, independent of the live file
         shutil.copy2(self.path, self.path.with_suffix(".json.bak.1"))
         logger.debug(f"Created recent backup: {self.path.with_suffix('.json.bak.1')}")
 
@@ -168,9 +448,9 @@ class GraphPersistence:
             old_daily = self.path.with_suffix(f".json.bak.daily.{i}")
             new_daily = self.path.with_suffix(f".json.bak.daily.{i + 1}")
             if old_daily.exists():
-                shutil.copy2(old_daily, new_daily)
+                os.replace(old_daily, new_daily)
 
-        shutil.copy2(source, daily_1)
+        self._link_or_copy(source, daily_1)
         logger.debug(f"Promoted to daily backup: {daily_1}")
 
     def _promote_to_weekly(self, source: Path, current_time: float):
@@ -187,7 +467,19 @@ class GraphPersistence:
             old_weekly = self.path.with_suffix(f".json.bak.weekly.{i}")
             new_weekly = self.path.with_suffix(f".json.bak.weekly.{i + 1}")
             if old_weekly.exists():
-                shutil.copy2(old_weekly, new_weekly)
+                os.replace(old_weekly, new_weekly)
 
-        shutil.copy2(source, weekly_1)
+        self._link_or_copy(source, weekly_1)
         logger.debug(f"Promoted to weekly backup: {weekly_1}")
+
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path):
+        """
+        Hardlink a backup into another tier. Backups are never modified after
+        creation, so sharing the inode is safe; copy if links aren't supported.
+        """
+        target.unlink(missing_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
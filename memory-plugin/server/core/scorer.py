@@ -1,6 +1,8 @@
 """Node scoring for compaction decisions."""
 
+import math
 import time
+from collections import Counter
 
 
 class NodeScorer:
@@ -19,54 +21,73 @@ class NodeScorer:
         current_time = time.time()
 
         # Count edges per node
-        edge_count = {}
-        for edge in edges.values():
-            edge_count[edge["from"]] = edge_count.get(edge["from"], 0) + 1
-            edge_count[edge["to"]] = edge_count.get(edge["to"], 0) + 1
-
-        # Collect eligible nodes (past grace period, not archived)
-        eligible = []
+        edge_count = Counter(
+            endpoint
+            for edge in edges.values()
+            for endpoint in (edge["from"], edge["to"])
+        )
+        edge_count_get = edge_count.get
+
+        # Collect eligible nodes (past grace period, not archived) as
+        # parallel lists rather than one dict per node, in a single pass
+        cutoff = current_time - self.grace_period_seconds
+        versions_get = versions.get
+        ids = []
+        recency_raw = []
+        connectedness_raw = []
+        richness_raw = []
         for node_id, node in nodes.items():
-            if node.get("_archived"):
+            if "_archived" in node:
                 continue
 
-            version_key = f"node:{node_id}"
-            version = versions.get(version_key, {})
-            last_update = version.get("ts", current_time)
-            age_seconds = current_time - last_update
+            # Inlined version_key_node(): ("node", node_id)
+            version = versions_get(("node", node_id))
+            last_update = version.get("ts", current_time) if version else current_time
 
             # Skip nodes within grace period
-            if age_seconds < self.grace_period_seconds:
+            if last_update > cutoff:
                 continue
 
-            eligible.append({
-                "id": node_id,
-                "recency_raw": -age_seconds,  # Negative so higher = fresher
-                "connectedness_raw": edge_count.get(node_id, 0) + len(node.get("touches", [])),
-                "richness_raw": len(node.get("gist", "")) + sum(len(n) for n in node.get("notes", []))
-            })
+            ids.append(node_id)
+            # Last update time ranks the same as negated age: higher = fresher
+            recency_raw.append(last_update)
+            connectedness_raw.append(edge_count_get(node_id, 0) + len(node.get("touches", ())))
+            richness_raw.append(len(node.get("gist", "")) + sum(map(len, node.get("notes", ()))))
 
-        if not eligible:
+        n = len(ids)
+        if not n:
             return {}
-
-        # Percentile ranking
-        def assign_percentiles(items: list, raw_key: str, pct_key: str):
-            sorted_items = sorted(items, key=lambda x: x[raw_key])
-            n = len(sorted_items)
-            for i, item in enumerate(sorted_items):
-                item[pct_key] = i / (n - 1) if n > 1 else 0.5
-
-        assign_percentiles(eligible, "recency_raw", "recency_pct")
-        assign_percentiles(eligible, "connectedness_raw", "connectedness_pct")
-        assign_percentiles(eligible, "richness_raw", "richness_pct")
-
-        # Final score = product of percentiles
-        scores = {}
-        for item in eligible:
-            scores[item["id"]] = (
-                item["recency_pct"] *
-                item["connectedness_pct"] *
-                item["richness_pct"]
-            )
-
-        return scores
+        if n == 1:
+            return {ids[0]: 3 * math.log1p(0.5)}
+
+        # Percentile ranking: sort indices by raw value, then scatter rank / (n - 1).
+        # Tied values share the average of their ranks, so the result doesn't
+        # depend on the order nodes happen to be stored in
+        def percentiles(raw: list) -> list[float]:
+            pct = [0.0] * n
+            scale = n - 1
+            order = sorted(range(n), key=raw.__getitem__)
+            start = 0
+            while start < n:
+                value = raw[order[start]]
+                end = start + 1
+                while end < n and raw[order[end]] == value:
+                    end += 1
+                p = (start + end - 1) / 2 / scale
+                for j in range(start, end):
+                    pct[order[j]] = p
+                start = end
+            return pct
+
+        recency_pct = percentiles(recency_raw)
+        connectedness_pct = percentiles(connectedness_raw)
+        richness_pct = percentiles(richness_raw)
+
+        # Final score = sum of log1p(percentile). Unlike a plain product, a
+        # zero percentile in one dimension doesn't flatten the other two, so
+        # nodes at the bottom of any single ranking still order among themselves
+        log1p = math.log1p
+        return {
+            node_id: log1p(r) + log1p(c) + log1p(w)
+            for node_id, r, c, w in zip(ids, recency_pct, connectedness_pct, richness_pct)
+        }
@@ -9,7 +9,7 @@ class Node(TypedDict):
     gist: str
     touches: NotRequired[list[str]]
     notes: NotRequired[list[str]]
-    _archived: NotRequired[bool]
+    _archived: NotRequired[bool]  # Only ever True; removed on unarchive, so test with 'in'
     _orphaned_ts: NotRequired[float]
 
 
@@ -1,22 +1,47 @@
 """Utility functions for knowledge graph operations."""
 
+import sys
+
 from .constants import LEVELS
 from .exceptions import KGError
 
 
 def is_archived(node: dict) -> bool:
     """Check if a node is archived."""
-    return node.get("_archived", False)
+    return "_archived" in node
 
 
-def version_key_node(node_id: str) -> str:
+def version_key_node(node_id: str) -> tuple[str, str]:
     """Generate version key for a node."""
-    return f"node:{node_id}"
+    return ("node", node_id)
 
 
-def version_key_edge(from_ref: str, to_ref: str, rel: str) -> str:
+def version_key_edge(from_ref: str, to_ref: str, rel: str) -> tuple[str, str, str, str]:
     """Generate version key for an edge."""
-    return f"edge:{from_ref}->{to_ref}:{rel}"
+    return ("edge", from_ref, to_ref, rel)
+
+
+def version_key_to_str(key: tuple) -> str:
+    """Convert a tuple version key to its on-disk string form."""
+    if key[0] == "node":
+        return f"node:{key[1]}"
+    return f"edge:{edge_storage_key(*key[1:])}"
+
+
+def version_key_from_str(key: str, edge_keys: dict | None = None) -> tuple:
+    """
+    Convert an on-disk version key string back to its tuple form.
+    edge_keys maps edge storage keys to tuple keys, which resolves edge
+    keys whose parts contain '->' or ':' without guessing.
+    """
+    kind, _, ref = key.partition(":")
+    if kind == "node":
+        return ("node", sys.intern(ref))
+    if edge_keys and ref in edge_keys:
+        return ("edge", *edge_keys[ref])
+    from_ref, _, rest = ref.partition("->")
+    to_ref, _, rel = rest.rpartition(":")
+    return ("edge", sys.intern(from_ref), sys.intern(to_ref), sys.intern(rel))
 
 
 def edge_storage_key(from_ref: str, to_ref: str, rel: str) -> str:
@@ -1,8 +1,10 @@
 """Session management for HTTP MCP server with project path tracking."""
 
 import logging
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
 from core.constants import SESSION_ID_LENGTH, SESSION_TTL_SECONDS
 from core.exceptions import SessionNotFoundError
@@ -15,7 +17,16 @@ class HTTPSessionManager:
 
     def __init__(self, session_ttl: int = SESSION_TTL_SECONDS):
         self.session_ttl = session_ttl
-        self._sessions: dict[str, dict] = {}
+        # Kept in last-activity order (oldest first), so expiry only has
+        # to look at the front
+        self._sessions: OrderedDict[str, dict] = OrderedDict()
+        # Request handlers and the store's saver thread both touch sessions;
+        # held only for the dict operations, never across graph work
+        self._lock = threading.Lock()
+        # last_activity is only compared in memory, so it uses the monotonic
+        # clock (immune to wall-clock steps); start_ts stays wall-clock since
+        # it's compared against version timestamps
+        self._clock = time.monotonic
 
     def register(self, project_path: str | None = None) -> dict:
         """
@@ -28,55 +39,67 @@ class HTTPSessionManager:
         # Resolve project_path to absolute to prevent cwd-dependent behavior
         resolved_project_path = str(Path(project_path).resolve()) if project_path else None
 
-        self._sessions[session_id] = {
-            "start_ts": ts,
-            "project_path": resolved_project_path,
-            "last_activity": ts,
-        }
+        with self._lock:
+            self._sessions[session_id] = {
+                "start_ts": ts,
+                "project_path": resolved_project_path,
+                "last_activity": self._clock(),
+            }
 
         logger.info(f"Session registered: {session_id} (project: {resolved_project_path or 'none'})")
         return {"session_id": session_id, "start_ts": ts}
 
     def get_project_path(self, session_id: str) -> str | None:
         """Get project path for a session. Raises SessionNotFoundError if not found."""
-        if session_id not in self._sessions:
-            raise SessionNotFoundError(session_id)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFoundError(session_id)
 
-        self._update_activity(session_id)
-        return self._sessions[session_id]["project_path"]
+            self._update_activity(session_id)
+            return session["project_path"]
 
     def get_start_ts(self, session_id: str) -> float:
         """Get session start timestamp. Raises SessionNotFoundError if not found."""
-        if session_id not in self._sessions:
+        session = self._sessions.get(session_id)
+        if session is None:
             raise SessionNotFoundError(session_id)
 
-        return self._sessions[session_id]["start_ts"]
+        return session["start_ts"]
 
     def is_valid(self, session_id: str) -> bool:
         """Check if session exists and is not expired."""
-        if session_id not in self._sessions:
+        session = self._sessions.get(session_id)
+        if session is None:
             return False
 
         # Check expiration
-        session = self._sessions[session_id]
-        age = time.time() - session["last_activity"]
+        age = self._clock() - session["last_activity"]
         return age <= self.session_ttl
 
     def _update_activity(self, session_id: str):
-        """Update last activity timestamp for a session."""
-        if session_id in self._sessions:
-            self._sessions[session_id]["last_activity"] = time.time()
+        """Update last activity timestamp for a session. Caller must hold the lock."""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session["last_activity"] = self._clock()
+            self._sessions.move_to_end(session_id)
 
     def cleanup_expired(self) -> int:
         """Remove expired sessions. Returns count of removed sessions."""
-        current_time = time.time()
-        expired = [
-            sid for sid, data in self._sessions.items()
-            if current_time - data["last_activity"] > self.session_ttl
-        ]
+        current_time = self._clock()
+        expired = []
+
+        # Stop at the first session still within its TTL: everything after
+        # it was active more recently
+        with self._lock:
+            while self._sessions:
+                sid, data = next(iter(self._sessions.items()))
+                if current_time - data["last_activity"] <= self.session_ttl:
+                    break
+                self._sessions.popitem(last=False)
+                expired.append(sid)
 
         for sid in expired:
-            del self._sessions[sid]
             logger.info(f"Session expired: {sid}")
 
         return len(expired)
@@ -87,8 +110,9 @@ class HTTPSessionManager:
 
     def get_all_project_paths(self) -> set[str]:
         """Get all unique project paths from active sessions."""
-        return {
-            data["project_path"]
-            for data in self._sessions.values()
-            if data["project_path"] is not None
-        }
+        with self._lock:
+            return {
+                data["project_path"]
+                for data in self._sessions.values()
+                if data["project_path"] is not None
+            }
@@ -1,8 +1,11 @@
 """Multi-project knowledge graph store for HTTP MCP server."""
 
 import logging
+import os
+import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 from dataclasses import dataclass
@@ -15,10 +18,13 @@ from core import (
     Graph,
     GRACE_PERIOD_DAYS,
     ORPHAN_GRACE_DAYS,
+    SAVE_COALESCE_SECONDS,
+    MAX_PATH_HOPS,
     PROJECT_KNOWLEDGE_PATH,
-    is_archived,
     version_key_node,
     version_key_edge,
+    edge_storage_key,
+    KGError,
     NodeNotFoundError,
     NodeNotArchivedError,
     validate_level,
@@ -35,7 +41,25 @@ class GraphConfig:
     orphan_grace_days: int = ORPHAN_GRACE_DAYS
     grace_period_days: int = GRACE_PERIOD_DAYS
     save_interval: int = 30
+    save_coalesce: float = SAVE_COALESCE_SECONDS
     user_path: Path = Path.home() / ".claude/knowledge/user.json"
+    pretty: bool = False  # Indent entries in saved graph files
+
+    @classmethod
+    def from_env(cls) -> "GraphConfig":
+        """
+        Build configuration from KG_* environment variables, falling back to defaults.
+        Read once at startup; the store keeps the resulting instance.
+        """
+        defaults = cls()
+        return cls(
+            max_tokens=int(os.getenv("KG_MAX_TOKENS", defaults.max_tokens)),
+            orphan_grace_days=int(os.getenv("KG_ORPHAN_GRACE_DAYS", defaults.orphan_grace_days)),
+            grace_period_days=int(os.getenv("KG_GRACE_PERIOD_DAYS", defaults.grace_period_days)),
+            save_interval=int(os.getenv("KG_SAVE_INTERVAL", defaults.save_interval)),
+            user_path=Path(os.getenv("KG_USER_PATH", defaults.user_path)),
+            pretty=os.getenv("KG_PRETTY") == "1",
+        )
 
 
 class MultiProjectGraphStore:
@@ -61,26 +85,72 @@ class MultiProjectGraphStore:
         self.graphs: dict[str, Graph] = {}
         self._versions: dict[str, dict] = {}
         self._persistence: dict[str, GraphPersistence] = {}
-
-        # Thread safety
-        self.lock = threading.RLock()
-        self.dirty: dict[str, bool] = {}
+        # Cached token estimates per graph (node_id -> tokens), set when a node
+        # is written, filled lazily for loaded nodes, dropped on delete
+        self._tokens: dict[str, dict[str, int]] = {}
+        # Non-archived nodes per graph (same objects as graph["nodes"]), so
+        # compaction and pruning only visit nodes that can be archived
+        self._active: dict[str, dict[str, dict]] = {}
+        # Edge keys touching each node, per graph, so removing a node's edges
+        # doesn't scan every edge
+        self._adj: dict[str, dict[str, set[tuple]]] = {}
+        # Read views per graph ({"nodes": [...], "edges": [...]}), dropped on
+        # every change and rebuilt by the next read; a reader that finds a
+        # current view returns it without taking the graph's lock
+        self._read_views: dict[str, dict] = {}
+        # Earliest time the next orphan prune can find anything, per graph:
+        # 0 after a change to edges or archived state, else the first grace
+        # expiry, so idle saver passes skip the scan
+        self._next_prune: dict[str, float] = {}
+
+        # Live counters per graph, updated under the graph's lock on every
+        # mutation so that health checks can read them without locking
+        self._stats: dict[str, dict[str, int]] = {}
+
+        # Thread safety: one lock per graph, so writes to different graphs
+        # (user vs. project, or two projects) proceed in parallel
+        self._locks: dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        # Version keys of items changed since the last save, per graph
+        self.dirty: dict[str, set[tuple]] = {}
+
+        # Serializes disk writes between the saver thread and shutdown, since
+        # writes happen outside the graph locks. Taken before a graph's lock
+        self._save_lock = threading.Lock()
+
+        # Set by writers (and shutdown) so the saver wakes up instead of polling
+        self._wake = threading.Event()
 
         # Background saver
         self.running = True
         self.saver_thread = threading.Thread(target=self._periodic_save, daemon=True)
 
+        # Backup rotation copies files, so it runs off the save path without
+        # holding a graph lock; one worker keeps rotations from overlapping
+        self._backup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kg-backup")
+        # Saves of different graphs in one saver pass run side by side, so
+        # their writes and fsyncs overlap instead of queueing one after another
+        self._write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kg-write")
+
         # Load user graph
         self._load_user_graph()
         self.saver_thread.start()
 
         logger.info("Multi-project graph store initialized")
 
+    def _lock_for(self, graph_key: str) -> threading.RLock:
+        """Get the lock guarding a graph, creating it on first use."""
+        lock = self._locks.get(graph_key)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(graph_key, threading.RLock())
+        return lock
+
     def _load_user_graph(self):
         """Load the shared user graph."""
-        with self.lock:
-            user_key = "user"
-            persistence = GraphPersistence(self.config.user_path)
+        user_key = "user"
+        with self._lock_for(user_key):
+            persistence = GraphPersistence(self.config.user_path, pretty=self.config.pretty)
             graph, versions = persistence.load()
 
             # Clean up orphaned edges (edges pointing to non-existent nodes)
@@ -89,13 +159,14 @@ class MultiProjectGraphStore:
             self.graphs[user_key] = graph
             self._versions[user_key] = versions
             self._persistence[user_key] = persistence
-            self.dirty[user_key] = False
+            self.dirty[user_key] = set()
+            self._index_loaded(user_key, graph)
 
             logger.info(f"Loaded user graph: {len(graph['nodes'])} nodes, {len(graph['edges'])} edges")
 
     def _ensure_project_loaded(self, graph_path: str):
         """
-        Load a project graph if not already loaded. Caller must hold lock.
+        Load a project graph if not already loaded. Caller must hold the graph's lock.
         graph_path: Full path to graph.json file
         """
         project_key = f"project:{graph_path}"
@@ -104,7 +175,7 @@ class MultiProjectGraphStore:
             return
 
         # Load from disk
-        persistence = GraphPersistence(Path(graph_path))
+        persistence = GraphPersistence(Path(graph_path), pretty=self.config.pretty)
         graph, versions = persistence.load()
 
         # Clean up orphaned edges (edges pointing to non-existent nodes)
@@ -113,10 +184,124 @@ class MultiProjectGraphStore:
         self.graphs[project_key] = graph
         self._versions[project_key] = versions
         self._persistence[project_key] = persistence
-        self.dirty[project_key] = False
+        self.dirty[project_key] = set()
+        self._index_loaded(project_key, graph)
 
         logger.info(f"Loaded project graph from {graph_path}: {len(graph['nodes'])} nodes, {len(graph['edges'])} edges")
 
+    def _index_loaded(self, graph_key: str, graph: dict):
+        """
+        Set up live counters, token cache and active-node index for a newly
+        loaded graph. Caller must hold the graph's lock.
+        """
+        nodes = graph["nodes"]
+        self._stats[graph_key] = {"nodes": len(nodes), "edges": len(graph["edges"])}
+        self._tokens[graph_key] = {}
+        self._active[graph_key] = {
+            node_id: node for node_id, node in nodes.items() if "_archived" not in node
+        }
+        self._adj[graph_key] = {}
+        for edge_key in graph["edges"]:
+            self._link_edge(graph_key, edge_key)
+        self._next_prune[graph_key] = 0.0
+
+        # Versions of items deleted before deletes dropped them; gone from
+        # disk at the next full save
+        versions = self._versions[graph_key]
+        edges = graph["edges"]
+        stale = [
+            key for key in versions
+            if (key[1] not in nodes if key[0] == "node" else key[1:] not in edges)
+        ]
+        for key in stale:
+            del versions[key]
+
+        # Keep versions in timestamp order (oldest first); _bump_version moves
+        # each updated key to the end, so sync can stop at its cutoff
+        ordered = sorted(versions.items(), key=lambda item: item[1].get("ts", 0))
+        versions.clear()
+        versions.update(ordered)
+
+    def _link_edge(self, graph_key: str, edge_key: tuple):
+        """Add an edge to the adjacency index. Caller must hold the graph's lock."""
+        adj = self._adj[graph_key]
+        adj.setdefault(edge_key[0], set()).add(edge_key)
+        adj.setdefault(edge_key[1], set()).add(edge_key)
+        # May reconnect an orphan
+        self._next_prune[graph_key] = 0.0
+
+    def _unlink_edge(self, graph_key: str, edge_key: tuple):
+        """Remove an edge from the adjacency index. Caller must hold the graph's lock."""
+        adj = self._adj[graph_key]
+        # May orphan an archived node
+        self._next_prune[graph_key] = 0.0
+        for node_id in edge_key[:2]:
+            keys = adj.get(node_id)
+            if keys is not None:
+                keys.discard(edge_key)
+                if not keys:
+                    del adj[node_id]
+
+    def _remove_incident_edges(self, graph_key: str, node_id: str) -> list[tuple]:
+        """
+        Delete every edge touching a node. Caller must hold the graph's lock.
+        Returns the removed edge keys.
+        """
+        edges = self.graphs[graph_key]["edges"]
+        removed = list(self._adj[graph_key].get(node_id, ()))
+        for edge_key in removed:
+            del edges[edge_key]
+            self._unlink_edge(graph_key, edge_key)
+        return removed
+
+    def _shortest_path(
+        self, graph_key: str, src: str, dst: str, max_hops: int = MAX_PATH_HOPS
+    ) -> list[str] | None:
+        """
+        Find a shortest chain of nodes linking src to dst, following edges in
+        either direction. Caller must hold the graph's lock.
+        Returns node ids from src to dst, or None if none is within max_hops.
+        """
+        if src == dst:
+            return [src]
+
+        # Bidirectional BFS: grow the smaller frontier one hop at a time until
+        # the two searches meet, so each side only goes about half the depth
+        adj = self._adj[graph_key]
+        parents = ({src: None}, {dst: None})  # node -> previous node toward that side's root
+        frontiers = [[src], [dst]]
+
+        for _ in range(max_hops):
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+            next_frontier = []
+            for node_id in frontiers[side]:
+                for edge_key in adj.get(node_id, ()):
+                    neighbor = edge_key[1] if edge_key[0] == node_id else edge_key[0]
+                    if neighbor in seen:
+                        continue
+                    seen[neighbor] = node_id
+                    if neighbor in other:
+                        # Walk back to src, then forward to dst
+                        path = []
+                        step = neighbor
+                        while step is not None:
+                            path.append(step)
+                            step = parents[0][step]
+                        path.reverse()
+                        step = parents[1][neighbor]
+                        while step is not None:
+                            path.append(step)
+                            step = parents[1][step]
+                        return path
+                    next_frontier.append(neighbor)
+
+            if not next_frontier:
+                return None
+            frontiers[side] = next_frontier
+
+        return None
+
     def _get_graph_key(self, level: str, session_id: str | None) -> str:
         """Get the graph storage key for a level and session."""
         validate_level(level)
@@ -133,13 +318,44 @@ class MultiProjectGraphStore:
 
             return f"project:{project_path}"
 
-    def _bump_version(self, graph_key: str, key: str, session_id: str | None = None) -> dict:
-        """Increment version for a key and return new version. Caller must hold lock."""
-        ts = time.time()
-        current = self._versions[graph_key].get(key, {"v": 0})
-        new_ver = {"v": current["v"] + 1, "ts": ts, "session": session_id}
-        self._versions[graph_key][key] = new_ver
-        return new_ver
+    def _bump_version(
+        self, graph_key: str, key: tuple, session_id: str | None = None, ts: float | None = None
+    ) -> dict:
+        """
+        Increment version for a key and return new version. Caller must hold the graph's lock.
+        The key moves to the end of the versions dict, which stays in timestamp order.
+        ts: timestamp shared by a batch of writes; read from the clock if omitted.
+        """
+        if ts is None:
+            ts = time.time()
+        versions = self._versions[graph_key]
+        ver = versions.pop(key, None)
+        if ver is None:
+            ver = {"v": 1, "ts": ts, "session": session_id}
+        else:
+            # Update the existing record in place
+            ver["v"] += 1
+            ver["ts"] = ts
+            ver["session"] = session_id
+        versions[key] = ver
+        return ver
+
+    def _drop_versions(self, graph_key: str, keys):
+        """
+        Forget version records of deleted items, so sync only walks live ones.
+        Caller must hold the graph's lock.
+        """
+        versions = self._versions[graph_key]
+        for key in keys:
+            versions.pop(key, None)
+
+    def _mark_dirty(self, graph_key: str, *keys: tuple):
+        """Record changed items (by version key) and wake the saver. Caller must hold the graph's lock."""
+        self.dirty[graph_key].update(keys)
+        self._read_views.pop(graph_key, None)
+        # Already set while a save is pending; skip set()'s internal lock
+        if not self._wake.is_set():
+            self._wake.set()
 
     def _broadcast(self, message: dict, level: str, session_id: str | None = None):
         """Broadcast a change notification. Can be called from any thread."""
@@ -171,6 +387,18 @@ class MultiProjectGraphStore:
     # Public API
     # ========================================================================
 
+    def get_stats(self) -> dict:
+        """
+        Return totals of the live counters without taking any lock.
+        Returns dict with "loaded_graphs", "nodes" and "edges" totals.
+        """
+        counters = list(self._stats.values())
+        return {
+            "loaded_graphs": len(counters),
+            "nodes": sum(c["nodes"] for c in counters),
+            "edges": sum(c["edges"] for c in counters),
+        }
+
     def read_graphs(self, session_id: str | None = None, project_path: str | None = None) -> dict:
         """
         Read all accessible graphs for a session or project.
@@ -181,54 +409,68 @@ class MultiProjectGraphStore:
 
         Returns dict with "user" and "project" keys.
         """
-        with self.lock:
-            result = {
-                "user": {
-                    "nodes": list(self.graphs["user"]["nodes"].values()),
-                    "edges": list(self.graphs["user"]["edges"].values()),
-                },
-                "project": {"nodes": [], "edges": []}
-            }
+        result = {
+            "user": self._read_view("user"),
+            "project": {"nodes": [], "edges": []}
+        }
 
-            # Determine graph path
-            graph_path = None
+        # Determine graph path
+        graph_path = None
 
-            logger.info(f"read_graphs called with session_id={session_id}, project_path={project_path}")
+        logger.info(f"read_graphs called with session_id={session_id}, project_path={project_path}")
 
-            if session_id:
-                try:
-                    graph_path = self.session_manager.get_project_path(session_id)
-                except Exception as e:
-                    logger.warning(f"Could not get project path for session {session_id}: {e}")
+        if session_id:
+            try:
+                graph_path = self.session_manager.get_project_path(session_id)
+            except Exception as e:
+                logger.warning(f"Could not get project path for session {session_id}: {e}")
 
-            elif project_path:
-                # Direct project path provided (e.g., from visual editor)
-                # Convert project root to graph file path using hardcoded standard location
-                project_root = Path(project_path)
-                graph_file = project_root / PROJECT_KNOWLEDGE_PATH
+        elif project_path:
+            # Direct project path provided (e.g., from visual editor)
+            # Convert project root to graph file path using hardcoded standard location
+            project_root = Path(project_path)
+            graph_file = project_root / PROJECT_KNOWLEDGE_PATH
 
-                logger.info(f"Loading project graph: {graph_file} (exists: {graph_file.exists()})")
+            logger.info(f"Loading project graph: {graph_file} (exists: {graph_file.exists()})")
 
-                if graph_file.exists():
-                    graph_path = str(graph_file)
-                    logger.info(f"Set graph_path to: {graph_path}")
-                else:
-                    logger.warning(f"Graph file not found: {graph_file}")
+            if graph_file.exists():
+                graph_path = str(graph_file)
+                logger.info(f"Set graph_path to: {graph_path}")
+            else:
+                logger.warning(f"Graph file not found: {graph_file}")
 
-            # Load project graph if we have a path
-            if graph_path:
-                try:
-                    project_key = f"project:{graph_path}"
-                    self._ensure_project_loaded(graph_path)
+        # Load project graph if we have a path
+        if graph_path:
+            try:
+                result["project"] = self._read_view(f"project:{graph_path}")
+            except Exception as e:
+                logger.warning(f"Could not load project graph from {graph_path}: {e}")
 
-                    result["project"] = {
-                        "nodes": list(self.graphs[project_key]["nodes"].values()),
-                        "edges": list(self.graphs[project_key]["edges"].values()),
-                    }
-                except Exception as e:
-                    logger.warning(f"Could not load project graph from {graph_path}: {e}")
+        return result
 
-            return result
+    def _read_view(self, graph_key: str) -> dict:
+        """
+        Get a graph's nodes and edges as lists, shared between readers until the
+        next change. Rebuilt under the graph's lock (loading it if needed) when stale.
+        Callers must not modify the returned lists.
+        """
+        view = self._read_views.get(graph_key)
+        if view is not None:
+            return view
+
+        with self._lock_for(graph_key):
+            view = self._read_views.get(graph_key)
+            if view is None:
+                if graph_key.startswith("project:"):
+                    self._ensure_project_loaded(graph_key.split(":", 1)[1])
+
+                graph = self.graphs[graph_key]
+                view = {
+                    "nodes": list(graph["nodes"].values()),
+                    "edges": list(graph["edges"].values()),
+                }
+                self._read_views[graph_key] = view
+            return view
 
     def put_node(
         self,
@@ -240,37 +482,22 @@ class MultiProjectGraphStore:
         session_id: str | None = None,
     ) -> dict:
         """Create or update a node."""
-        with self.lock:
-            graph_key = self._get_graph_key(level, session_id)
+        graph_key = self._get_graph_key(level, session_id)
+        with self._lock_for(graph_key):
 
             # Ensure project graph is loaded
             if graph_key.startswith("project:"):
                 project_path = graph_key.split(":", 1)[1]
                 self._ensure_project_loaded(project_path)
 
-            nodes = self.graphs[graph_key]["nodes"]
-
-            # Create or update node
-            node = nodes.get(node_id, {"id": node_id})
-            node["gist"] = gist
-            if notes is not None:
-                node["notes"] = notes
-            if touches is not None:
-                node["touches"] = touches
-
-            # If updating archived node, unarchive it
-            if "_archived" in node:
-                del node["_archived"]
-            if "_orphaned_ts" in node:
-                del node["_orphaned_ts"]
-
-            nodes[node_id] = node
+            node, changed = self._apply_node(graph_key, node_id, gist, notes, touches, session_id)
 
-            # Update version
-            ver_key = version_key_node(node_id)
-            self._bump_version(graph_key, ver_key, session_id)
+            # Identical re-put: skip version bump, save and broadcast
+            if not changed:
+                logger.debug(f"Node '{node_id}' unchanged in {level} graph")
+                return {"node": node, "level": level, "unchanged": True}
 
-            self.dirty[graph_key] = True
+            self._mark_dirty(graph_key, version_key_node(node["id"]))
 
             # Run compaction if needed
             self._maybe_compact(graph_key)
@@ -283,7 +510,7 @@ class MultiProjectGraphStore:
             )
 
             logger.debug(f"Put node '{node_id}' in {level} graph")
-            return {"node": node, "level": level}
+            return {"node": node, "level": level, "unchanged": False}
 
     def put_edge(
         self,
@@ -295,29 +522,22 @@ class MultiProjectGraphStore:
         session_id: str | None = None,
     ) -> dict:
         """Create or update an edge."""
-        with self.lock:
-            graph_key = self._get_graph_key(level, session_id)
+        graph_key = self._get_graph_key(level, session_id)
+        with self._lock_for(graph_key):
 
             # Ensure project graph is loaded
             if graph_key.startswith("project:"):
                 project_path = graph_key.split(":", 1)[1]
                 self._ensure_project_loaded(project_path)
 
-            edges = self.graphs[graph_key]["edges"]
-            edge_key = (from_ref, to_ref, rel)
+            edge, changed = self._apply_edge(graph_key, from_ref, to_ref, rel, notes, session_id)
 
-            # Create or update edge
-            edge = edges.get(edge_key, {"from": from_ref, "to": to_ref, "rel": rel})
-            if notes is not None:
-                edge["notes"] = notes
+            # Identical re-put: skip version bump, save and broadcast
+            if not changed:
+                logger.debug(f"Edge {from_ref}->{to_ref}:{rel} unchanged in {level} graph")
+                return {"edge": edge, "level": level, "unchanged": True}
 
-            edges[edge_key] = edge
-
-            # Update version
-            ver_key = version_key_edge(from_ref, to_ref, rel)
-            self._bump_version(graph_key, ver_key, session_id)
-
-            self.dirty[graph_key] = True
+            self._mark_dirty(graph_key, version_key_edge(edge["from"], edge["to"], edge["rel"]))
 
             # Broadcast change
             self._broadcast(
@@ -327,12 +547,197 @@ class MultiProjectGraphStore:
             )
 
             logger.debug(f"Put edge {from_ref}->{to_ref}:{rel} in {level} graph")
-            return {"edge": edge, "level": level}
+            return {"edge": edge, "level": level, "unchanged": False}
+
+    def put_bulk(
+        self,
+        level: str,
+        nodes: list[dict] | None = None,
+        edges: list[dict] | None = None,
+        session_id: str | None = None,
+    ) -> dict:
+        """
+        Create or update many nodes and edges under one lock acquisition.
+        nodes take the put_node fields ({"id", "gist", "notes"?, "touches"?}),
+        edges the put_edge ones ({"from", "to", "rel", "notes"?}). Nodes are
+        applied first, and all changes share one version timestamp, one
+        saver wake-up and one compaction check. Every item is checked before
+        any is applied, so a malformed one rejects the whole batch.
+        """
+        nodes = nodes or ()
+        edges = edges or ()
+        for i, item in enumerate(nodes):
+            missing = [field for field in ("id", "gist") if field not in item]
+            if missing:
+                raise KGError(f"nodes[{i}] is missing {', '.join(missing)}")
+        for i, item in enumerate(edges):
+            missing = [field for field in ("from", "to", "rel") if field not in item]
+            if missing:
+                raise KGError(f"edges[{i}] is missing {', '.join(missing)}")
+
+        graph_key = self._get_graph_key(level, session_id)
+        with self._lock_for(graph_key):
+
+            # Ensure project graph is loaded
+            if graph_key.startswith("project:"):
+                project_path = graph_key.split(":", 1)[1]
+                self._ensure_project_loaded(project_path)
+
+            ts = time.time()
+            changed_nodes = []
+            changed_edges = []
+            unchanged = 0
+
+            try:
+                for item in nodes:
+                    node, changed = self._apply_node(
+                        graph_key, item["id"], item["gist"], item.get("notes"), item.get("touches"),
+                        session_id, ts,
+                    )
+                    if changed:
+                        changed_nodes.append(node)
+                    else:
+                        unchanged += 1
+
+                for item in edges:
+                    edge, changed = self._apply_edge(
+                        graph_key, item["from"], item["to"], item["rel"], item.get("notes"),
+                        session_id, ts,
+                    )
+                    if changed:
+                        changed_edges.append(edge)
+                    else:
+                        unchanged += 1
+            finally:
+                # Whatever was applied before a failure still gets saved and
+                # broadcast, so memory, disk and clients stay in step
+                if changed_nodes or changed_edges:
+                    self._mark_dirty(
+                        graph_key,
+                        *(version_key_node(node["id"]) for node in changed_nodes),
+                        *(version_key_edge(edge["from"], edge["to"], edge["rel"]) for edge in changed_edges),
+                    )
+
+                    # Run compaction if needed
+                    self._maybe_compact(graph_key)
+
+                    # Broadcast changes
+                    for node in changed_nodes:
+                        self._broadcast(
+                            {"type": "node_updated", "level": level, "node": node, "source_session": session_id},
+                            level,
+                            session_id
+                        )
+                    for edge in changed_edges:
+                        self._broadcast(
+                            {"type": "edge_updated", "level": level, "edge": edge, "source_session": session_id},
+                            level,
+                            session_id
+                        )
+
+            logger.debug(
+                f"Put {len(changed_nodes)} nodes, {len(changed_edges)} edges "
+                f"({unchanged} unchanged) in {level} graph"
+            )
+            return {
+                "level": level,
+                "nodes_saved": len(changed_nodes),
+                "edges_saved": len(changed_edges),
+                "unchanged": unchanged,
+            }
+
+    def _apply_node(
+        self,
+        graph_key: str,
+        node_id: str,
+        gist: str,
+        notes: list[str] | None,
+        touches: list[str] | None,
+        session_id: str | None,
+        ts: float | None = None,
+    ) -> tuple[dict, bool]:
+        """
+        Store a node and bump its version, without marking it dirty or
+        broadcasting. Caller must hold the graph's lock.
+        Returns (node, changed); an identical re-put returns the stored node unchanged.
+        """
+        # Share the loaded graph's strings (see GraphPersistence._load_snapshot)
+        node_id = sys.intern(node_id)
+        nodes = self.graphs[graph_key]["nodes"]
+
+        # Build the updated node as a copy so it can be compared to the stored one
+        existing = nodes.get(node_id)
+        node = dict(existing) if existing is not None else {"id": node_id}
+        node["gist"] = gist
+        if notes is not None:
+            node["notes"] = notes
+        if touches is not None:
+            node["touches"] = touches
+
+        # If updating archived node, unarchive it
+        if "_archived" in node:
+            del node["_archived"]
+        if "_orphaned_ts" in node:
+            del node["_orphaned_ts"]
+
+        if node == existing:
+            return existing, False
+
+        if existing is None:
+            self._stats[graph_key]["nodes"] += 1
+        elif "_archived" in existing:
+            self._next_prune[graph_key] = 0.0
+        nodes[node_id] = node
+        self._active[graph_key][node_id] = node
+        # Notes only change here, so measure them once on write rather
+        # than on the next compaction pass
+        self._tokens[graph_key][node_id] = self.estimator.estimate_node(node)
+
+        # Update version
+        self._bump_version(graph_key, version_key_node(node_id), session_id, ts)
+        return node, True
+
+    def _apply_edge(
+        self,
+        graph_key: str,
+        from_ref: str,
+        to_ref: str,
+        rel: str,
+        notes: list[str] | None,
+        session_id: str | None,
+        ts: float | None = None,
+    ) -> tuple[dict, bool]:
+        """
+        Store an edge and bump its version, without marking it dirty or
+        broadcasting. Caller must hold the graph's lock.
+        Returns (edge, changed); an identical re-put returns the stored edge unchanged.
+        """
+        from_ref, to_ref, rel = sys.intern(from_ref), sys.intern(to_ref), sys.intern(rel)
+        edges = self.graphs[graph_key]["edges"]
+        edge_key = (from_ref, to_ref, rel)
+
+        # Build the updated edge as a copy so it can be compared to the stored one
+        existing = edges.get(edge_key)
+        edge = dict(existing) if existing is not None else {"from": from_ref, "to": to_ref, "rel": rel}
+        if notes is not None:
+            edge["notes"] = notes
+
+        if edge == existing:
+            return existing, False
+
+        if existing is None:
+            self._stats[graph_key]["edges"] += 1
+            self._link_edge(graph_key, edge_key)
+        edges[edge_key] = edge
+
+        # Update version
+        self._bump_version(graph_key, version_key_edge(from_ref, to_ref, rel), session_id, ts)
+        return edge, True
 
     def delete_node(self, level: str, node_id: str, session_id: str | None = None) -> dict:
         """Delete a node and its connected edges."""
-        with self.lock:
-            graph_key = self._get_graph_key(level, session_id)
+        graph_key = self._get_graph_key(level, session_id)
+        with self._lock_for(graph_key):
 
             # Ensure project graph is loaded
             if graph_key.startswith("project:"):
@@ -340,24 +745,23 @@ class MultiProjectGraphStore:
                 self._ensure_project_loaded(project_path)
 
             nodes = self.graphs[graph_key]["nodes"]
-            edges = self.graphs[graph_key]["edges"]
 
             if node_id not in nodes:
                 raise NodeNotFoundError(level, node_id)
 
             # Delete connected edges
-            edges_to_delete = [
-                key for key, edge in edges.items()
-                if edge["from"] == node_id or edge["to"] == node_id
-            ]
-
-            for key in edges_to_delete:
-                del edges[key]
+            edges_to_delete = self._remove_incident_edges(graph_key, node_id)
 
             # Delete node
             del nodes[node_id]
+            self._active[graph_key].pop(node_id, None)
+            self.estimator.invalidate(self._tokens[graph_key], node_id)
 
-            self.dirty[graph_key] = True
+            self._stats[graph_key]["nodes"] -= 1
+            self._stats[graph_key]["edges"] -= len(edges_to_delete)
+            deleted_keys = [version_key_node(node_id), *(version_key_edge(*key) for key in edges_to_delete)]
+            self._drop_versions(graph_key, deleted_keys)
+            self._mark_dirty(graph_key, *deleted_keys)
 
             # Broadcast change
             self._broadcast(
@@ -378,8 +782,8 @@ class MultiProjectGraphStore:
         session_id: str | None = None,
     ) -> dict:
         """Delete an edge."""
-        with self.lock:
-            graph_key = self._get_graph_key(level, session_id)
+        graph_key = self._get_graph_key(level, session_id)
+        with self._lock_for(graph_key):
 
             # Ensure project graph is loaded
             if graph_key.startswith("project:"):
@@ -391,7 +795,11 @@ class MultiProjectGraphStore:
 
             if edge_key in edges:
                 del edges[edge_key]
-                self.dirty[graph_key] = True
+                self._unlink_edge(graph_key, edge_key)
+                self._stats[graph_key]["edges"] -= 1
+                ver_key = version_key_edge(from_ref, to_ref, rel)
+                self._drop_versions(graph_key, (ver_key,))
+                self._mark_dirty(graph_key, ver_key)
 
                 # Broadcast change
                 self._broadcast(
@@ -407,8 +815,8 @@ class MultiProjectGraphStore:
 
     def recall_node(self, level: str, node_id: str, session_id: str | None = None) -> dict:
         """Recall (unarchive) an archived node."""
-        with self.lock:
-            graph_key = self._get_graph_key(level, session_id)
+        graph_key = self._get_graph_key(level, session_id)
+        with self._lock_for(graph_key):
 
             # Ensure project graph is loaded
             if graph_key.startswith("project:"):
@@ -422,19 +830,21 @@ class MultiProjectGraphStore:
 
             node = nodes[node_id]
 
-            if not is_archived(node):
+            if "_archived" not in node:
                 raise NodeNotArchivedError(level, node_id)
 
             # Unarchive
             del node["_archived"]
             if "_orphaned_ts" in node:
                 del node["_orphaned_ts"]
+            self._active[graph_key][node_id] = node
+            self._next_prune[graph_key] = 0.0
 
             # Update version
             ver_key = version_key_node(node_id)
             self._bump_version(graph_key, ver_key, session_id)
 
-            self.dirty[graph_key] = True
+            self._mark_dirty(graph_key, ver_key)
 
             # Broadcast change
             self._broadcast(
@@ -451,63 +861,81 @@ class MultiProjectGraphStore:
         Get changes since a timestamp for a session.
         Returns dict with "user" and "project" diffs.
         """
-        with self.lock:
-            def get_updates(graph_key: str) -> dict:
-                versions = self._versions[graph_key]
-                updates = {
-                    "nodes": {},
-                    "edges": {},
-                }
-
-                for key, ver in versions.items():
-                    if ver["ts"] > start_ts and ver.get("session") != session_id:
-                        if key.startswith("node:"):
-                            node_id = key.split(":", 1)[1]
-                            if node_id in self.graphs[graph_key]["nodes"]:
-                                updates["nodes"][node_id] = self.graphs[graph_key]["nodes"][node_id]
-                        elif key.startswith("edge:"):
-                            # Parse edge key
-                            edge_part = key.split(":", 1)[1]
-                            # Find matching edge
-                            for edge in self.graphs[graph_key]["edges"].values():
-                                edge_id = f"{edge['from']}->{edge['to']}:{edge['rel']}"
-                                if edge_part == edge_id:
-                                    updates["edges"][edge_id] = edge
-                                    break
-
-                return updates
-
-            result = {
-                "user": get_updates("user"),
-                "project": {"nodes": {}, "edges": {}}
+        def get_updates(graph_key: str) -> dict:
+            updated_nodes = {}
+            updated_edges = {}
+            updates = {
+                "nodes": updated_nodes,
+                "edges": updated_edges,
             }
 
-            # Add project updates if session has one
-            try:
-                project_path = self.session_manager.get_project_path(session_id)
-                if project_path:
-                    project_key = f"project:{project_path}"
-                    if project_key in self.graphs:
-                        result["project"] = get_updates(project_key)
-            except Exception as e:
-                logger.warning(f"Could not get project updates for session {session_id}: {e}")
+            with self._lock_for(graph_key):
+                # Hoist per-graph lookups out of the loop
+                versions = self._versions[graph_key]
+                nodes = self.graphs[graph_key]["nodes"]
+                edges = self.graphs[graph_key]["edges"]
+
+                # Versions are in timestamp order: walk back from the newest
+                # to the cutoff, then visit those oldest-first as before
+                recent = []
+                for key in reversed(versions):
+                    ver = versions[key]
+                    if ver["ts"] <= start_ts:
+                        break
+                    if ver.get("session") != session_id:
+                        recent.append(key)
+
+                for key in reversed(recent):
+                    if key[0] == "node":
+                        node = nodes.get(key[1])
+                        if node is not None:
+                            updated_nodes[key[1]] = node
+                    else:
+                        # Edge version keys carry the edge storage tuple
+                        edge_key = key[1:]
+                        edge = edges.get(edge_key)
+                        if edge is not None:
+                            updated_edges[edge_storage_key(*edge_key)] = edge
+
+            return updates
+
+        result = {
+            "user": get_updates("user"),
+            "project": {"nodes": {}, "edges": {}}
+        }
+
+        # Add project updates if session has one
+        try:
+            project_path = self.session_manager.get_project_path(session_id)
+            if project_path:
+                project_key = f"project:{project_path}"
+                if project_key in self.graphs:
+                    result["project"] = get_updates(project_key)
+        except Exception as e:
+            logger.warning(f"Could not get project updates for session {session_id}: {e}")
 
-            return result
+        return result
 
     # ========================================================================
     # Maintenance
     # ========================================================================
 
     def _maybe_compact(self, graph_key: str):
-        """Compact graph if over token limit. Caller must hold lock."""
+        """Compact graph if over token limit. Caller must hold the graph's lock."""
+        active = self._active[graph_key]
         archived = self.compactor.compact_if_needed(
-            self.graphs[graph_key]["nodes"],
+            active,
             self.graphs[graph_key]["edges"],
-            self._versions[graph_key]
+            self._versions[graph_key],
+            self._tokens[graph_key],
         )
 
         if archived:
-            self.dirty[graph_key] = True
+            for node_id in archived:
+                del active[node_id]
+            self.dirty[graph_key].update(version_key_node(node_id) for node_id in archived)
+            self._read_views.pop(graph_key, None)
+            self._next_prune[graph_key] = 0.0
 
     def _clean_orphaned_edges(self, graph: dict):
         """
@@ -537,103 +965,179 @@ class MultiProjectGraphStore:
             logger.info(f"Cleaned {len(orphaned_keys)} orphaned edge(s)")
 
     def _prune_orphans(self, graph_key: str):
-        """Prune orphaned archived nodes after grace period. Caller must hold lock."""
+        """Prune orphaned archived nodes after grace period. Caller must hold the graph's lock."""
+        # No edge or archive change since the last pass, and no grace expired
+        current_time = time.time()
+        if current_time < self._next_prune[graph_key]:
+            return
+
         nodes = self.graphs[graph_key]["nodes"]
-        edges = self.graphs[graph_key]["edges"]
+        active_ids = self._active[graph_key]
 
-        # Build set of active node IDs
-        active_ids = {node_id for node_id, node in nodes.items() if not is_archived(node)}
+        # Nothing archived, nothing to prune
+        if len(active_ids) == len(nodes):
+            self._next_prune[graph_key] = float("inf")
+            return
 
-        # Build set of reachable archived nodes (connected to active)
-        reachable = set()
-        for edge in edges.values():
-            if edge["from"] in active_ids:
-                reachable.add(edge["to"])
-            if edge["to"] in active_ids:
-                reachable.add(edge["from"])
+        adj = self._adj[graph_key]
 
         # Process archived nodes
-        current_time = time.time()
         grace_seconds = self.config.orphan_grace_days * 24 * 60 * 60
         to_delete = []
+        next_expiry = float("inf")
 
         for node_id, node in nodes.items():
-            if not is_archived(node):
+            # Archived = not in the active index; no per-node flag lookup
+            if node_id in active_ids:
                 continue
 
-            if node_id in reachable:
+            # Reachable = some edge connects it to an active node
+            reachable = any(
+                (edge_key[1] if edge_key[0] == node_id else edge_key[0]) in active_ids
+                for edge_key in adj.get(node_id, ())
+            )
+
+            if reachable:
                 # Reconnected - clear orphaned timestamp
                 if "_orphaned_ts" in node:
                     del node["_orphaned_ts"]
-                    self.dirty[graph_key] = True
+                    self.dirty[graph_key].add(version_key_node(node_id))
+                    self._read_views.pop(graph_key, None)
             else:
                 # Orphaned
                 if "_orphaned_ts" not in node:
                     # Newly orphaned
                     node["_orphaned_ts"] = current_time
-                    self.dirty[graph_key] = True
+                    self.dirty[graph_key].add(version_key_node(node_id))
+                    self._read_views.pop(graph_key, None)
                     logger.debug(f"Node '{node_id}' orphaned in {graph_key}")
                 else:
                     # Check if grace expired
                     orphaned_duration = current_time - node["_orphaned_ts"]
                     if orphaned_duration > grace_seconds:
                         to_delete.append(node_id)
+                        continue
+                # Still orphaned: due for deletion once its grace runs out
+                next_expiry = min(next_expiry, node["_orphaned_ts"] + grace_seconds)
 
         # Delete expired orphans
         for node_id in to_delete:
             # Delete connected edges
-            edges_to_delete = [
-                key for key, edge in edges.items()
-                if edge["from"] == node_id or edge["to"] == node_id
-            ]
-            for key in edges_to_delete:
-                del edges[key]
+            edges_to_delete = self._remove_incident_edges(graph_key, node_id)
 
             del nodes[node_id]
-            self.dirty[graph_key] = True
+            self.estimator.invalidate(self._tokens[graph_key], node_id)
+            self._stats[graph_key]["nodes"] -= 1
+            self._stats[graph_key]["edges"] -= len(edges_to_delete)
+            deleted_keys = [version_key_node(node_id), *(version_key_edge(*key) for key in edges_to_delete)]
+            self._drop_versions(graph_key, deleted_keys)
+            self.dirty[graph_key].update(deleted_keys)
+            self._read_views.pop(graph_key, None)
             logger.info(f"Pruned orphaned node '{node_id}' from {graph_key}")
 
-    def _save_to_disk(self, graph_key: str) -> bool:
-        """Save a graph to disk. Caller must hold lock."""
-        success = self._persistence[graph_key].save(
-            self.graphs[graph_key],
-            self._versions[graph_key]
-        )
+        # Set after the deletes, whose edge removals reset it
+        self._next_prune[graph_key] = next_expiry
 
-        if success:
-            self._persistence[graph_key].maybe_backup()
+    def _save_to_disk(self, graph_key: str, full: bool = False) -> bool:
+        """
+        Persist a graph's changed items. Caller must hold the save lock, not the graph's lock.
+        Items are encoded under the graph's lock and written after releasing it,
+        so puts and reads don't wait on the write and fsync.
+        Appends them to the journal unless a full snapshot is due (or full=True).
+        """
+        persistence = self._persistence[graph_key]
+
+        with self._lock_for(graph_key):
+            changed = self.dirty[graph_key]
+            if not changed and not full:
+                return True
+
+            graph = self.graphs[graph_key]
+            versions = self._versions[graph_key]
+            snapshot = full or persistence.needs_snapshot(len(changed))
+            if snapshot:
+                data = persistence.encode_snapshot(graph, versions)
+            else:
+                data = persistence.encode_journal(graph, versions, changed)
+            if data is None:
+                return False
+
+            # Changes from here on go into the next save
+            self.dirty[graph_key] = set()
+
+        if snapshot:
+            success = persistence.write_snapshot(data)
+            if success:
+                self._backup_executor.submit(self._backup, persistence)
+        else:
+            success = persistence.write_journal(data, len(changed))
+
+        if not success:
+            # Retry these items with the next save
+            with self._lock_for(graph_key):
+                self.dirty[graph_key].update(changed)
 
         return success
 
+    def _backup(self, persistence: GraphPersistence):
+        """Rotate a graph file's backups if one is due. Runs on the backup executor."""
+        try:
+            persistence.maybe_backup()
+        except Exception as e:
+            logger.error(f"Failed to back up {persistence.path}: {e}")
+
     def _periodic_save(self):
         """Background thread for periodic saves and maintenance."""
         while self.running:
-            time.sleep(self.config.save_interval)
+            # Sleep until a write arrives, or save_interval passes for maintenance
+            requested = self._wake.wait(timeout=self.config.save_interval)
+
+            if not self.running:
+                break
+
+            # Let the rest of a write burst land so it shares one save
+            if requested:
+                time.sleep(self.config.save_coalesce)
+
+            self._wake.clear()
 
-            with self.lock:
+            # One graph at a time, so maintenance only blocks that graph
+            with self._save_lock:
+                to_save = []
                 for graph_key in list(self.graphs.keys()):
-                    # Run maintenance
-                    self._maybe_compact(graph_key)
-                    self._prune_orphans(graph_key)
+                    with self._lock_for(graph_key):
+                        # Run maintenance
+                        self._maybe_compact(graph_key)
+                        self._prune_orphans(graph_key)
+
+                        if self.dirty[graph_key]:
+                            to_save.append(graph_key)
 
-                    # Save if dirty
-                    if self.dirty.get(graph_key, False):
-                        if self._save_to_disk(graph_key):
-                            self.dirty[graph_key] = False
+                # Save dirty graphs; each graph still gets a single save per pass
+                if len(to_save) == 1:
+                    self._save_to_disk(to_save[0])
+                elif to_save:
+                    list(self._write_executor.map(self._save_to_disk, to_save))
 
-                # Cleanup expired sessions
-                self.session_manager.cleanup_expired()
+            # Cleanup expired sessions
+            self.session_manager.cleanup_expired()
 
     def shutdown(self):
         """Gracefully shutdown the store."""
         logger.info("Shutting down graph store...")
         self.running = False
+        self._wake.set()
         self.saver_thread.join(timeout=5)
 
-        # Final save
-        with self.lock:
-            for graph_key in self.graphs.keys():
-                if self.dirty.get(graph_key, False):
-                    self._save_to_disk(graph_key)
+        # Final save: fold any journal into a snapshot, so the next start
+        # loads a single file with nothing to replay
+        with self._save_lock:
+            for graph_key in list(self.graphs.keys()):
+                if self.dirty.get(graph_key) or self._persistence[graph_key].journal_entries:
+                    self._save_to_disk(graph_key, full=True)
+
+        # Let pending backups finish
+        self._write_executor.shutdown(wait=True)
+        self._backup_executor.shutdown(wait=True)
 
         logger.info("Graph store shutdown complete")
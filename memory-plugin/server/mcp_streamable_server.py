@@ -6,6 +6,7 @@ Uses Streamable HTTP transport (replaces deprecated SSE).
 
 import asyncio
 import contextlib
+import json
 import logging
 import os
 import sys
@@ -34,6 +35,16 @@ from core.exceptions import (
     NodeNotArchivedError,
 )
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # Optional: installed by uvicorn[standard] except on Windows
+    uvloop = None
+
 # Configure logging
 log_level = os.getenv("KG_LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -50,6 +61,162 @@ connection_manager: ConnectionManager | None = None
 mcp_server: Server | None = None
 
 
+# ============================================================================
+# Tool Handlers
+# ============================================================================
+
+
+def _json_text(obj) -> str:
+    """Encode obj as compact JSON text for a tool response, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _tool_kg_ping(arguments: dict) -> list[TextContent]:
+    """Report server version, session count and graph size."""
+    stats = store.get_stats() if store else {"nodes": 0, "edges": 0}
+    return [TextContent(
+        type="text",
+        text=f"OK - Server version {__version__}, {session_manager.count() if session_manager else 0} active sessions, {stats['nodes']} nodes, {stats['edges']} edges"
+    )]
+
+
+def _tool_kg_register_session(arguments: dict) -> list[TextContent]:
+    """Register a session for sync tracking."""
+    project_path = arguments.get("project_path")
+    result = session_manager.register(project_path)
+    return [TextContent(
+        type="text",
+        text=f"Session registered: {result['session_id']}\nStart time: {result['start_ts']}"
+    )]
+
+
+def _tool_kg_read(arguments: dict) -> list[TextContent]:
+    """Return both graph levels for the session."""
+    session_id = arguments.get("session_id")
+    graphs = store.read_graphs(session_id)
+
+    # Format output
+    user_nodes = len(graphs["user"]["nodes"])
+    user_edges = len(graphs["user"]["edges"])
+    proj_nodes = len(graphs["project"]["nodes"])
+    proj_edges = len(graphs["project"]["edges"])
+
+    return [TextContent(
+        type="text",
+        text=f"Knowledge Graph:\n\nUser level: {user_nodes} nodes, {user_edges} edges\nProject level: {proj_nodes} nodes, {proj_edges} edges\n\n{_json_text(graphs)}"
+    )]
+
+
+def _tool_kg_put_node(arguments: dict) -> list[TextContent]:
+    """Create or update a node."""
+    result = store.put_node(
+        level=arguments["level"],
+        node_id=arguments["id"],
+        gist=arguments["gist"],
+        notes=arguments.get("notes"),
+        touches=arguments.get("touches"),
+        session_id=arguments.get("session_id")
+    )
+    status = "unchanged in" if result["unchanged"] else "saved to"
+    return [TextContent(
+        type="text",
+        text=f"Node '{arguments['id']}' {status} {arguments['level']} graph"
+    )]
+
+
+def _tool_kg_put_edge(arguments: dict) -> list[TextContent]:
+    """Create or update an edge."""
+    result = store.put_edge(
+        level=arguments["level"],
+        from_ref=arguments["from"],
+        to_ref=arguments["to"],
+        rel=arguments["rel"],
+        notes=arguments.get("notes"),
+        session_id=arguments.get("session_id")
+    )
+    status = "unchanged in" if result["unchanged"] else "saved to"
+    return [TextContent(
+        type="text",
+        text=f"Edge {arguments['from']}->{arguments['to']}:{arguments['rel']} {status} {arguments['level']} graph"
+    )]
+
+
+def _tool_kg_delete_node(arguments: dict) -> list[TextContent]:
+    """Delete a node and its connected edges."""
+    result = store.delete_node(
+        level=arguments["level"],
+        node_id=arguments["id"],
+        session_id=arguments.get("session_id")
+    )
+    return [TextContent(
+        type="text",
+        text=f"Deleted node '{arguments['id']}' and {result['edges_deleted']} connected edges from {arguments['level']} graph"
+    )]
+
+
+def _tool_kg_delete_edge(arguments: dict) -> list[TextContent]:
+    """Delete an edge."""
+    result = store.delete_edge(
+        level=arguments["level"],
+        from_ref=arguments["from"],
+        to_ref=arguments["to"],
+        rel=arguments["rel"],
+        session_id=arguments.get("session_id")
+    )
+    status = "deleted" if result["deleted"] else "not found"
+    return [TextContent(
+        type="text",
+        text=f"Edge {status}: {arguments['from']}->{arguments['to']}:{arguments['rel']}"
+    )]
+
+
+def _tool_kg_recall(arguments: dict) -> list[TextContent]:
+    """Restore an archived node."""
+    result = store.recall_node(
+        level=arguments["level"],
+        node_id=arguments["id"],
+        session_id=arguments.get("session_id")
+    )
+    return [TextContent(
+        type="text",
+        text=f"Recalled node '{arguments['id']}' from {arguments['level']} graph archive"
+    )]
+
+
+def _tool_kg_sync(arguments: dict) -> list[TextContent]:
+    """Return changes made by other sessions since this one started."""
+    session_id = arguments["session_id"]
+    start_ts = session_manager.get_start_ts(session_id)
+    updates = store.get_sync_diff(session_id, start_ts)
+
+    user_updates = len(updates["user"]["nodes"]) + len(updates["user"]["edges"])
+    proj_updates = len(updates["project"]["nodes"]) + len(updates["project"]["edges"])
+
+    if user_updates == 0 and proj_updates == 0:
+        return [TextContent(type="text", text="No updates from other sessions")]
+
+    return [TextContent(
+        type="text",
+        text=f"Updates from other sessions:\n\nUser: {user_updates} changes\nProject: {proj_updates} changes\n\n{_json_text(updates)}"
+    )]
+
+
+# Tool name -> handler, built once rather than matched per call
+_TOOL_HANDLERS = {
+    "kg_ping": _tool_kg_ping,
+    "kg_register_session": _tool_kg_register_session,
+    "kg_read": _tool_kg_read,
+    "kg_put_node": _tool_kg_put_node,
+    "kg_put_edge": _tool_kg_put_edge,
+    "kg_delete_node": _tool_kg_delete_node,
+    "kg_delete_edge": _tool_kg_delete_edge,
+    "kg_recall": _tool_kg_recall,
+    "kg_sync": _tool_kg_sync,
+}
+
+
 def create_mcp_server() -> Server:
     """Create and configure MCP server with all tools."""
     server = Server("knowledge-graph-mcp")
@@ -256,122 +423,11 @@ def create_mcp_server() -> Server:
     @server.call_tool()
     async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         """Handle tool calls."""
-        global store, session_manager
-
         try:
-            if name == "kg_ping":
-                return [TextContent(
-                    type="text",
-                    text=f"OK - Server version {__version__}, {session_manager.count() if session_manager else 0} active sessions"
-                )]
-
-            elif name == "kg_register_session":
-                project_path = arguments.get("project_path")
-                result = session_manager.register(project_path)
-                return [TextContent(
-                    type="text",
-                    text=f"Session registered: {result['session_id']}\nStart time: {result['start_ts']}"
-                )]
-
-            elif name == "kg_read":
-                session_id = arguments.get("session_id")
-                graphs = store.read_graphs(session_id)
-
-                # Format output
-                user_nodes = len(graphs["user"]["nodes"])
-                user_edges = len(graphs["user"]["edges"])
-                proj_nodes = len(graphs["project"]["nodes"])
-                proj_edges = len(graphs["project"]["edges"])
-
-                import json
-                return [TextContent(
-                    type="text",
-                    text=f"Knowledge Graph:\n\nUser level: {user_nodes} nodes, {user_edges} edges\nProject level: {proj_nodes} nodes, {proj_edges} edges\n\n{json.dumps(graphs, indent=2)}"
-                )]
-
-            elif name == "kg_put_node":
-                result = store.put_node(
-                    level=arguments["level"],
-                    node_id=arguments["id"],
-                    gist=arguments["gist"],
-                    notes=arguments.get("notes"),
-                    touches=arguments.get("touches"),
-                    session_id=arguments.get("session_id")
-                )
-                return [TextContent(
-                    type="text",
-                    text=f"Node '{arguments['id']}' saved to {arguments['level']} graph"
-                )]
-
-            elif name == "kg_put_edge":
-                result = store.put_edge(
-                    level=arguments["level"],
-                    from_ref=arguments["from"],
-                    to_ref=arguments["to"],
-                    rel=arguments["rel"],
-                    notes=arguments.get("notes"),
-                    session_id=arguments.get("session_id")
-                )
-                return [TextContent(
-                    type="text",
-                    text=f"Edge {arguments['from']}->{arguments['to']}:{arguments['rel']} saved to {arguments['level']} graph"
-                )]
-
-            elif name == "kg_delete_node":
-                result = store.delete_node(
-                    level=arguments["level"],
-                    node_id=arguments["id"],
-                    session_id=arguments.get("session_id")
-                )
-                return [TextContent(
-                    type="text",
-                    text=f"Deleted node '{arguments['id']}' and {result['edges_deleted']} connected edges from {arguments['level']} graph"
-                )]
-
-            elif name == "kg_delete_edge":
-                result = store.delete_edge(
-                    level=arguments["level"],
-                    from_ref=arguments["from"],
-                    to_ref=arguments["to"],
-                    rel=arguments["rel"],
-                    session_id=arguments.get("session_id")
-                )
-                status = "deleted" if result["deleted"] else "not found"
-                return [TextContent(
-                    type="text",
-                    text=f"Edge {status}: {arguments['from']}->{arguments['to']}:{arguments['rel']}"
-                )]
-
-            elif name == "kg_recall":
-                result = store.recall_node(
-                    level=arguments["level"],
-                    node_id=arguments["id"],
-                    session_id=arguments.get("session_id")
-                )
-                return [TextContent(
-                    type="text",
-                    text=f"Recalled node '{arguments['id']}' from {arguments['level']} graph archive"
-                )]
-
-            elif name == "kg_sync":
-                session_id = arguments["session_id"]
-                start_ts = session_manager.get_start_ts(session_id)
-                updates = store.get_sync_diff(session_id, start_ts)
-
-                user_updates = len(updates["user"]["nodes"]) + len(updates["user"]["edges"])
-                proj_updates = len(updates["project"]["nodes"]) + len(updates["project"]["edges"])
-
-                if user_updates == 0 and proj_updates == 0:
-                    return [TextContent(type="text", text="No updates from other sessions")]
-
-                import json
-                return [TextContent(
-                    type="text",
-                    text=f"Updates from other sessions:\n\nUser: {user_updates} changes\nProject: {proj_updates} changes\n\n{json.dumps(updates, indent=2)}"
-                )]
-
-            else:
+            handler = _TOOL_HANDLERS.get(name)
+            if handler is None:
                 raise ValueError(f"Unknown tool: {name}")
+            return handler(arguments)
 
         except NodeNotFoundError as e:
             return [TextContent(type="text", text=f"Error: {str(e)}")]
@@ -393,13 +449,7 @@ async def main():
     global store, session_manager, connection_manager, mcp_server
 
     # Load configuration
-    config = GraphConfig(
-        max_tokens=int(os.getenv("KG_MAX_TOKENS", "5000")),
-        orphan_grace_days=int(os.getenv("KG_ORPHAN_GRACE_DAYS", "7")),
-        grace_period_days=int(os.getenv("KG_GRACE_PERIOD_DAYS", "7")),
-        save_interval=int(os.getenv("KG_SAVE_INTERVAL", "30")),
-        user_path=Path(os.getenv("KG_USER_PATH", str(Path.home() / ".claude/knowledge/user.json"))),
-    )
+    config = GraphConfig.from_env()
 
     session_manager = HTTPSessionManager()
     connection_manager = ConnectionManager()
@@ -438,7 +488,7 @@ async def main():
             "version": __version__,
             "transport": "streamable-http",
             "active_sessions": session_manager.count(),
-            "loaded_graphs": len(store.graphs)
+            **store.get_stats()
         }
 
     @rest_api.get("/api/graph/read")
@@ -467,7 +517,7 @@ async def main():
                 "version": __version__,
                 "transport": "streamable-http",
                 "active_sessions": session_manager.count(),
-                "loaded_graphs": len(store.graphs)
+                **store.get_stats()
             })
             await response(scope, receive, send)
         elif path.startswith("/api/"):
@@ -524,16 +574,28 @@ async def main():
 
     import uvicorn
 
-    # Run uvicorn server
+    # Run uvicorn server. Its HTTP parser defaults to httptools when
+    # installed; a line per request is only worth its cost when debugging
     config_uvi = uvicorn.Config(
         app,
         host=host,
         port=port,
-        log_level=log_level.lower()
+        log_level=log_level.lower(),
+        access_log=log_level == "DEBUG",
     )
     server_uvi = uvicorn.Server(config_uvi)
     await server_uvi.serve()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvicorn's loop setting only applies to loops it creates; this one is
+    # ours, so make it a uvloop one here
+    if uvloop is None:
+        asyncio.run(main())
+    elif sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(main())
+    else:
+        # No loop_factory before 3.11; the policy API is not deprecated there
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        asyncio.run(main())
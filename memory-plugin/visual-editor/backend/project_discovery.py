@@ -4,16 +4,54 @@ Project discovery utilities for visual editor.
 Discovers Claude Code projects from ~/.claude/projects/ directory.
 """
 
+import asyncio
 import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib parser
+    orjson = None
+
+# Log calls pass arguments instead of f-strings: they run once per project
+# on the discovery pool, and this way filtered-out levels skip formatting
 logger = logging.getLogger(__name__)
 
+# Threads collecting project metadata in parallel (see discover_projects)
+DISCOVERY_WORKERS = 16
+
+# Entries kept by the memoized path helpers; well above typical project counts
+PATH_CACHE_SIZE = 1024
+
+# Seconds a project path found deleted is skipped without checking again
+MISSING_PATH_TTL = 60
+
+# Results kept between discover_projects() calls, so repeated /api/projects
+# requests only stat what they would otherwise parse. Session file path ->
+# its .cwd (a session never changes directory), and graph.json path ->
+# ((st_mtime_ns, st_size), stats) for the file version they were read from
+_CWD_CACHE: dict[str, Path] = {}
+_GRAPH_STATS_CACHE: dict[str, tuple[tuple[int, int], tuple[bool, Optional[int], Optional[int]]]] = {}
+# Project path -> time.monotonic() when it was last found deleted
+_MISSING_PATHS: dict[Path, float] = {}
 
-@dataclass
+
+def _loads(data: bytes):
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(slots=True)
 class ScraperStatus:
     """Status of incremental scraper."""
     enabled: bool = False
@@ -32,9 +70,12 @@ class ScraperStatus:
             self.details = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class ProjectMetadata:
-    """Complete project metadata."""
+    """
+    Complete project metadata. discover_projects() returns these fields as
+    plain dicts, built directly rather than through asdict().
+    """
     project_path: str
     display_name: str
     last_used: float
@@ -46,7 +87,9 @@ class ProjectMetadata:
     codebase_scraper: Optional[dict] = None
 
 
-def decode_claude_project_path_from_cwd(project_dir: Path) -> Path | None:
+def decode_claude_project_path_from_cwd(
+    project_dir: Path, session_file: str | None = None
+) -> Path | None:
     """
     Get actual project path from .cwd field in session files.
 
@@ -55,33 +98,86 @@ def decode_claude_project_path_from_cwd(project_dir: Path) -> Path | None:
 
     Args:
         project_dir: Path to ~/.claude/projects/<encoded-name>/
+        session_file: Name of a session file in project_dir, if the caller
+            already listed them (see scan_sessions); found by glob otherwise
 
     Returns:
         Decoded project path or None if no sessions found
     """
-    import json
-
-    # Find any .jsonl file (not agent-)
-    session_files = [f for f in project_dir.glob("*.jsonl")
-                     if not f.name.startswith("agent-")]
+    if session_file is None:
+        # Find any .jsonl file (not agent-)
+        session_file = next(
+            (f.name for f in project_dir.glob("*.jsonl") if not f.name.startswith("agent-")),
+            None,
+        )
 
-    if not session_files:
+    if session_file is None:
         return None
 
-    # Read first line of first session file to get .cwd
+    session_path = str(project_dir / session_file)
+    cached = _CWD_CACHE.get(session_path)
+    if cached is not None:
+        return cached
+
+    # Read first line of first session file to get .cwd; binary, so the line
+    # is parsed from bytes without a text decoding layer
     try:
-        with open(session_files[0], 'r') as f:
+        with open(session_path, 'rb') as f:
             first_line = f.readline()
-            data = json.loads(first_line)
+            data = _loads(first_line)
             cwd = data.get('cwd')
             if cwd:
-                return Path(cwd)
+                _CWD_CACHE[session_path] = Path(cwd)
+                return _CWD_CACHE[session_path]
     except Exception:
         pass
 
     return None
 
 
+def scan_sessions(dir_path: str) -> tuple[int, float, str | None]:
+    """
+    Collect session stats for a project directory in one pass.
+
+    Uses os.scandir, so each entry's name comes from the directory listing
+    and only .jsonl files are stat()ed, once each. agent- files are subagent
+    transcripts: they count towards last_used but not as conversations.
+
+    Args:
+        dir_path: Path to ~/.claude/projects/<encoded-name>/
+
+    Returns:
+        Tuple of (conversation_count, last_used, first conversation file name);
+        (0, 0, None) if the directory can't be read
+    """
+    conversation_count = 0
+    last_used = 0
+    first_session = None
+
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                name = entry.name
+                if not name.endswith(".jsonl"):
+                    continue
+
+                mtime = entry.stat().st_mtime
+                if mtime > last_used:
+                    last_used = mtime
+
+                if not name.startswith("agent-"):
+                    conversation_count += 1
+                    if first_session is None:
+                        first_session = name
+    except OSError as e:
+        # One unreadable project must not fail the whole listing
+        logger.warning("Error reading sessions in %s: %s", dir_path, e)
+        return 0, 0, None
+
+    return conversation_count, last_used, first_session
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
 def decode_claude_project_path(encoded: str) -> Path:
     """
     Decode Claude Code's project directory naming (FALLBACK ONLY).
@@ -110,6 +206,7 @@ def decode_claude_project_path(encoded: str) -> Path:
         return Path(encoded)
 
 
+@lru_cache(maxsize=PATH_CACHE_SIZE)
 def format_project_name(project_path: Path) -> str:
     """
     Extract short, readable name from project path.
@@ -151,22 +248,34 @@ def load_graph_stats(graph_path: Path) -> tuple[bool, Optional[int], Optional[in
     Returns:
         Tuple of (has_graph, node_count, edge_count)
     """
-    if not graph_path.exists():
+    try:
+        st = graph_path.stat()
+    except OSError:
         return False, None, None
 
+    # Unchanged since the last read: reuse its counts instead of parsing
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _GRAPH_STATS_CACHE.get(str(graph_path))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
     try:
-        data = json.loads(graph_path.read_text())
+        # Parsed from bytes: no separate decode to str first
+        data = _loads(graph_path.read_bytes())
 
-        # Graph format: {"nodes": {...}, "edges": {...}}
+        # Graph format: {"nodes": {...}, "edges": [...]}
+        # (edges were a dict keyed by "from->to:rel" before schema 2)
         nodes = data.get("nodes", {})
-        edges = data.get("edges", {})
+        edges = data.get("edges", [])
 
         node_count = len(nodes) if isinstance(nodes, dict) else 0
-        edge_count = len(edges) if isinstance(edges, dict) else 0
+        edge_count = len(edges) if isinstance(edges, (dict, list)) else 0
 
-        return True, node_count, edge_count
+        stats = (True, node_count, edge_count)
+        _GRAPH_STATS_CACHE[str(graph_path)] = (version, stats)
+        return stats
     except Exception as e:
-        logger.error(f"Error reading graph {graph_path}: {e}")
+        logger.error("Error reading graph %s: %s", graph_path, e)
         return True, None, None  # File exists but couldn't parse
 
 
@@ -182,108 +291,132 @@ def load_scraper_status(project_path: Path) -> dict:
     """
     status_path = project_path / ".knowledge/.scraper_status.json"
 
-    if status_path.exists():
-        try:
-            return json.loads(status_path.read_text())
-        except Exception as e:
-            logger.error(f"Error reading scraper status {status_path}: {e}")
+    # Open directly rather than probing with exists() first
+    try:
+        with open(status_path, 'rb') as f:
+            return _loads(f.read())
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error("Error reading scraper status %s: %s", status_path, e)
 
     # Fallback: check old marker files
-    history_marker = project_path / ".knowledge/.history_scraped"
-    codebase_marker = project_path / ".knowledge/.codebase_scraped"
+    history_done = (project_path / ".knowledge/.history_scraped").exists()
+    codebase_done = (project_path / ".knowledge/.codebase_scraped").exists()
 
     return {
         "history": asdict(ScraperStatus(
-            enabled=history_marker.exists(),
-            completed=history_marker.exists(),
-            progress_pct=100.0 if history_marker.exists() else 0.0
+            enabled=history_done,
+            completed=history_done,
+            progress_pct=100.0 if history_done else 0.0
         )),
         "codebase": asdict(ScraperStatus(
-            enabled=codebase_marker.exists(),
-            completed=codebase_marker.exists(),
-            progress_pct=100.0 if codebase_marker.exists() else 0.0
+            enabled=codebase_done,
+            completed=codebase_done,
+            progress_pct=100.0 if codebase_done else 0.0
         ))
     }
 
 
-def discover_projects() -> list[dict]:
+def _collect_project(entry: os.DirEntry) -> dict | None:
     """
-    Discover all Claude Code projects from ~/.claude/projects/.
+    Build metadata for one ~/.claude/projects/ entry.
+
+    Args:
+        entry: Directory entry for ~/.claude/projects/<encoded-name>/
 
     Returns:
-        List of project metadata dicts, sorted by last_used (most recent first)
+        Project metadata dict, or None if the project directory was deleted
     """
-    projects_dir = Path.home() / ".claude" / "projects"
+    project_dir = Path(entry.path)
 
-    if not projects_dir.exists():
-        logger.warning(f"Projects directory not found: {projects_dir}")
-        return []
+    # Get conversation stats from .jsonl files
+    conversation_count, last_used, first_session = scan_sessions(entry.path)
 
-    projects = []
+    # Decode project path from session files (reliable)
+    project_path = decode_claude_project_path_from_cwd(project_dir, first_session)
 
-    for project_dir in projects_dir.iterdir():
-        if not project_dir.is_dir():
-            continue
+    # Fallback: decode from directory name (ambiguous)
+    if project_path is None:
+        project_path = decode_claude_project_path(project_dir.name)
+        logger.warning("Using fallback path decoding for %s -> %s", project_dir.name, project_path)
 
-        # Decode project path from session files (reliable)
-        project_path = decode_claude_project_path_from_cwd(project_dir)
+    # Found deleted moments ago: skip without touching the filesystem
+    missing_since = _MISSING_PATHS.get(project_path)
+    if missing_since is not None:
+        if time.monotonic() - missing_since < MISSING_PATH_TTL:
+            return None
+        # Two folders can decode to the same path, and their workers may both get here
+        _MISSING_PATHS.pop(project_path, None)
 
-        # Fallback: decode from directory name (ambiguous)
-        if project_path is None:
-            project_path = decode_claude_project_path(project_dir.name)
-            logger.warning(f"Using fallback path decoding for {project_dir.name} -> {project_path}")
+    # Get graph stats
+    graph_path = project_path / ".knowledge" / "graph.json"
+    has_graph, node_count, edge_count = load_graph_stats(graph_path)
 
-        # Check if project directory still exists
-        project_exists = project_path.exists()
+    # Check if project directory still exists (a graph inside it proves it does)
+    project_exists = has_graph or project_path.exists()
 
-        if not project_exists:
-            logger.debug(f"Project directory deleted: {project_path}")
-            continue  # Skip deleted projects
+    if not project_exists:
+        logger.debug("Project directory deleted: %s", project_path)
+        _MISSING_PATHS[project_path] = time.monotonic()
+        return None  # Skip deleted projects
 
-        # Get conversation stats from .jsonl files
-        jsonl_files = list(project_dir.glob("*.jsonl"))
+    # Get scraper status
+    scraper_status = load_scraper_status(project_path)
 
-        # Filter out agent files (optional, or keep them)
-        conversation_files = [
-            f for f in jsonl_files
-            if not f.name.startswith("agent-")
-        ]
+    # Create metadata: the ProjectMetadata fields, as the dict the API returns
+    return {
+        "project_path": str(project_path),
+        "display_name": format_project_name(project_path),
+        "last_used": last_used,
+        "conversation_count": conversation_count,
+        "has_graph": has_graph,
+        "node_count": node_count,
+        "edge_count": edge_count,
+        "history_scraper": scraper_status.get("history"),
+        "codebase_scraper": scraper_status.get("codebase"),
+    }
 
-        if jsonl_files:
-            last_used = max((f.stat().st_mtime for f in jsonl_files), default=0)
-        else:
-            last_used = 0
-
-        # Get graph stats
-        graph_path = project_path / ".knowledge" / "graph.json"
-        has_graph, node_count, edge_count = load_graph_stats(graph_path)
-
-        # Get scraper status
-        scraper_status = load_scraper_status(project_path)
-
-        # Create metadata
-        metadata = ProjectMetadata(
-            project_path=str(project_path),
-            display_name=format_project_name(project_path),
-            last_used=last_used,
-            conversation_count=len(conversation_files),
-            has_graph=has_graph,
-            node_count=node_count,
-            edge_count=edge_count,
-            history_scraper=scraper_status.get("history"),
-            codebase_scraper=scraper_status.get("codebase")
-        )
 
-        projects.append(asdict(metadata))
+def discover_projects() -> list[dict]:
+    """
+    Discover all Claude Code projects from ~/.claude/projects/.
+
+    Projects are independent and their collection is almost all file I/O,
+    which releases the GIL, so they are collected on a thread pool.
+
+    Returns:
+        List of project metadata dicts, sorted by last_used (most recent first)
+    """
+    projects_dir = Path.home() / ".claude" / "projects"
+
+    try:
+        with os.scandir(projects_dir) as it:
+            project_entries = [entry for entry in it if entry.is_dir()]
+    except FileNotFoundError:
+        logger.warning("Projects directory not found: %s", projects_dir)
+        return []
+
+    if not project_entries:
+        return []
+
+    workers = min(DISCOVERY_WORKERS, len(project_entries))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="discovery") as executor:
+        projects = [p for p in executor.map(_collect_project, project_entries) if p is not None]
 
     # Sort by last_used descending (most recent first)
-    projects.sort(key=lambda p: p["last_used"], reverse=True)
+    projects.sort(key=itemgetter("last_used"), reverse=True)
 
-    logger.info(f"Discovered {len(projects)} projects")
+    logger.info("Discovered %d projects", len(projects))
 
     return projects
 
 
+async def discover_projects_async() -> list[dict]:
+    """Run discover_projects() in a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(discover_projects)
+
+
 if __name__ == "__main__":
     # Test discovery
     logging.basicConfig(level=logging.INFO)
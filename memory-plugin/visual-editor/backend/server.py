@@ -1,5 +1,6 @@
 """Visual Editor Backend - FastAPI server for knowledge graph visualization."""
 
+import contextlib
 import logging
 import os
 import sys
@@ -8,12 +9,12 @@ from pathlib import Path
 import httpx
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 # Import project discovery utilities
 sys.path.insert(0, str(Path(__file__).parent))
-from project_discovery import discover_projects
+from project_discovery import discover_projects_async
 
 # Configure logging
 logging.basicConfig(
@@ -25,8 +26,24 @@ logger = logging.getLogger(__name__)
 # MCP Server configuration
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://127.0.0.1:8765")
 MCP_TIMEOUT = 30.0
+MCP_KEEPALIVE_CONNECTIONS = 16
 
-app = FastAPI(title="Knowledge Graph Visual Editor", version="0.1.0")
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open one MCP server client for the app's lifetime, so requests reuse its connections."""
+    app.state.mcp_client = httpx.AsyncClient(
+        base_url=MCP_SERVER_URL,
+        timeout=MCP_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=MCP_KEEPALIVE_CONNECTIONS),
+    )
+    try:
+        yield
+    finally:
+        await app.state.mcp_client.aclose()
+
+
+app = FastAPI(title="Knowledge Graph Visual Editor", version="0.1.0", lifespan=lifespan)
 
 # CORS configuration (allow browser access)
 app.add_middleware(
@@ -59,9 +76,8 @@ async def serve_index():
 async def health_check():
     """Health check endpoint."""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{MCP_SERVER_URL}/api/health")
-            mcp_status = response.json() if response.status_code == 200 else {"status": "down"}
+        response = await app.state.mcp_client.get("/api/health", timeout=5.0)
+        mcp_status = response.json() if response.status_code == 200 else {"status": "down"}
     except Exception as e:
         logger.error(f"MCP server health check failed: {e}")
         mcp_status = {"status": "down", "error": str(e)}
@@ -82,7 +98,7 @@ async def list_projects():
         List of projects with stats, sorted by last_used (most recent first)
     """
     try:
-        projects = discover_projects()
+        projects = await discover_projects_async()
         return projects
     except Exception as e:
         logger.exception("Error discovering projects")
@@ -106,26 +122,23 @@ async def get_graph(session_id: str | None = None, project_path: str | None = No
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=MCP_TIMEOUT) as client:
-            # Use MCP server's REST API
-            params = {}
-            if session_id:
-                params["session_id"] = session_id
-            if project_path:
-                params["project_path"] = project_path
-
-            response = await client.get(
-                f"{MCP_SERVER_URL}/api/graph/read",
-                params=params
+        # Use MCP server's REST API
+        params = {}
+        if session_id:
+            params["session_id"] = session_id
+        if project_path:
+            params["project_path"] = project_path
+
+        response = await app.state.mcp_client.get("/api/graph/read", params=params)
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"MCP server error: {response.text}"
             )
 
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"MCP server error: {response.text}"
-                )
-
-            return response.json()
+        # Already JSON: pass the bytes through rather than parsing and re-encoding
+        return Response(content=response.content, media_type="application/json")
 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="MCP server timeout")